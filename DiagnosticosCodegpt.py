@@ -1,526 +1,3624 @@
 import os
 import sys
+import argparse
+import base64
+import gzip
+import hashlib
+import json
 import subprocess
 import re
+import shutil
+import signal
+import atexit
 import logging
+import logging.handlers
+import mmap
+import queue
+import random
 import socket
-import urllib.request
-from PyQt5.QtWidgets import (
-    QApplication, QMainWindow, QPlainTextEdit, QPushButton, QVBoxLayout, QHBoxLayout,
-    QWidget, QProgressBar, QMenuBar, QAction, QMessageBox, QFileDialog, QLabel,
-    QCheckBox, QToolTip
-)
-from PyQt5.QtGui import QFont, QCursor, QColor, QIcon
-from PyQt5.QtCore import Qt, pyqtSignal, QThread, QUrl
-from PyQt5.QtWebEngineWidgets import QWebEngineView
+import ssl
+import struct
+import threading
+import time
+from array import array
+from collections import Counter, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from selectors import DefaultSelector, EVENT_READ
+from urllib.parse import unquote, urlsplit
+from urllib.request import getproxies
 
-# Configuración del registro de logs
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    filename='troubleshooter.log'
-)
 logger = logging.getLogger(__name__)
 
-class WorkerThread(QThread):
-    progress = pyqtSignal(str)
-    finished = pyqtSignal(list)
-    error = pyqtSignal(str)
+# Configuración del registro de logs
+LOG_FILE = 'troubleshooter.log'
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+_log_listener = None
+
+
+class JsonLogFormatter(logging.Formatter):
+    """
+    Formatea cada registro como una línea JSON.
+    """
+
+    def format(self, record):
+        entry = {'ts': round(record.created, 3), 'level': record.levelname, 'logger': record.name,
+                 'thread': record.threadName, 'message': record.getMessage()}
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def setup_logging(path=LOG_FILE, json_lines=False, max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT):
+    """
+    Configura el registro de logs fuera de los hilos que lo emiten.
+
+    Los hilos solo encolan los registros; un `QueueListener` en segundo plano
+    los escribe en archivos rotados por tamaño, en texto o en JSON lines.
+    """
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+    file_handler = logging.handlers.RotatingFileHandler(
+        path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True)
+    file_handler.setFormatter(JsonLogFormatter() if json_lines else logging.Formatter(LOG_FORMAT))
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(logging.DEBUG)
+    _log_listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _log_listener.start()
+
+
+def shutdown_logging():
+    """
+    Vacía la cola de logs y detiene el hilo que escribe en disco.
+    """
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
+atexit.register(shutdown_logging)
+
+# Dominios verificados en cada diagnóstico
+CODEGPT_DOMAINS = ['api.codegpt.co', 'storage.codegpt.co', 'api.github.com', 'github.com']
+REFERENCE_DOMAINS = ['google.com', 'microsoft.com']
+
+# Límites de los sondeos de red (segundos)
+PROBE_TIMEOUT = 5
+PROBE_DEADLINE = 8
+# Plazo por fase de las muestras que comparan la conexión con y sin proxy
+PROXY_COMPARE_TIMEOUT = 1.5
+MAX_PROBE_WORKERS = 16
+
+# Muestras por sondeo HTTP para calcular percentiles de latencia
+HTTP_PROBE_SAMPLES = 3
+
+# Las sondas solo leen la cabecera de la respuesta y reutilizan conexiones
+MAX_PROBE_RESPONSE_BYTES = 16 * 1024
+# Códigos 4xx que confirman que el servidor funciona aunque rechace el sondeo
+# (va sin credenciales y usa HEAD)
+HTTP_REACHABLE_STATUSES = (401, 403, 405)
+POOL_IDLE_TIMEOUT = 30
+
+# Prueba de velocidad opcional (--throughput): URL medidas, descarga máxima,
+# tamaño del bloque reutilizado, pausa sin datos que cuenta como atasco (s) y
+# velocidad mínima aceptable (KB/s)
+THROUGHPUT_URLS = []
+THROUGHPUT_DEFAULT_URL = 'https://storage.codegpt.co/'
+THROUGHPUT_MAX_BYTES = 8 * 1024 * 1024
+THROUGHPUT_MAX_SECONDS = 10
+THROUGHPUT_CHUNK = 64 * 1024
+THROUGHPUT_STALL = 1.0
+THROUGHPUT_MIN_KBPS = 100
+
+# Resolvedores DNS directos (UDP) comparados con el resolvedor del sistema.
+# Cada entrada es "ip" o "ip:puerto" ("[ipv6]:puerto" para IPv6).
+DNS_RESOLVERS = ['1.1.1.1', '8.8.8.8']
+DNS_TIMEOUT = 2
+# TTL aplicado a las respuestas del sistema (no informa TTL) y a las negativas
+SYSTEM_DNS_TTL = 30
+NEGATIVE_DNS_TTL = 30
+DNS_QTYPES = {'A': 1, 'AAAA': 28}
+
+# Directorio donde se guarda el estado entre ejecuciones (offsets de logs, cachés)
+STATE_DIR = os.environ.get('DIAGNOSTICOS_CODEGPT_STATE',
+                           os.path.join(os.path.expanduser('~'), '.diagnosticos_codegpt'))
+
+# Informes NDJSON escritos por la interfaz mientras avanza el diagnóstico
+REPORT_NDJSON = os.path.join(STATE_DIR, 'ultimo_diagnostico.ndjson')
+MONITOR_NDJSON = os.path.join(STATE_DIR, 'monitoreo.ndjson')
+
+# Diagnóstico incremental: componentes del entorno de los que depende cada
+# verificación y tiempo (segundos) durante el que un resultado sano se reutiliza.
+# Las verificaciones sin entrada aquí (los logs ya son incrementales) siempre se ejecutan.
+CHECK_INPUTS = {
+    'extension': ('extensions',),
+    'ports': (),
+    'dns': ('interfaces', 'resolvers', 'proxy'),
+    'http': ('interfaces', 'resolvers', 'proxy'),
+    'reference': ('interfaces', 'resolvers', 'proxy'),
+}
+CHECK_TTLS = {'extension': 300, 'ports': 15, 'dns': 60, 'http': 60, 'reference': 60}
+
+# Integridad de la extensión: tamaño a partir del cual un archivo se lee con
+# mmap e hilos que calculan los hashes en paralelo
+INTEGRITY_MMAP_THRESHOLD = 1024 * 1024
+INTEGRITY_WORKERS = min(8, os.cpu_count() or 1)
+
+# Solo se analizan las sesiones de logs de VS Code modificadas en los últimos días
+LOG_MAX_AGE_DAYS = 7
+
+# Objetivo estable del análisis de logs, igual en todas las máquinas; el
+# directorio analizado, que depende del usuario, solo aparece en el mensaje
+LOGS_TARGET = 'exthost'
+
+# Firmas de errores de CodeGPT en los logs del host de extensiones
+LOG_SIGNATURES = {
+    'conexion_rechazada': ('Conexión rechazada (ECONNREFUSED)', rb'ECONNREFUSED'),
+    'tiempo_agotado': ('Tiempo de espera agotado (ETIMEDOUT)', rb'ETIMEDOUT|ESOCKETTIMEDOUT'),
+    'dns': ('Nombre no resuelto (ENOTFOUND/EAI_AGAIN)', rb'ENOTFOUND|EAI_AGAIN'),
+    'conexion_reiniciada': ('Conexión reiniciada (ECONNRESET)', rb'ECONNRESET|socket hang up'),
+    'puerto_ocupado': ('Puerto en uso (EADDRINUSE)', rb'EADDRINUSE'),
+    'certificado': ('Error de certificado TLS',
+                    rb'UNABLE_TO_VERIFY_LEAF_SIGNATURE|SELF_SIGNED_CERT_IN_CHAIN|'
+                    rb'self[- ]signed certificate|CERT_HAS_EXPIRED'),
+    'autenticacion': ('Clave de API rechazada (401/403)', rb'\b(?:401|403)\b.{0,40}(?:Unauthorized|Forbidden)'),
+    'limite': ('Límite de peticiones (429)', rb'\b429\b|Too Many Requests'),
+    'activacion': ('Fallo al activar la extensión', rb'Activating extension.{0,80}failed'),
+    'host_terminado': ('Host de extensiones terminado inesperadamente',
+                       rb'[Ee]xtension host terminated unexpectedly'),
+}
+
+# Puertos usados por CodeGPT y los procesos que se espera que los ocupen
+# (por ejemplo, los proveedores de modelos locales)
+CODEGPT_PORTS = {
+    11434: ('ollama',),
+    1234: ('lm studio', 'lms'),
+}
+PORT_SCAN_TIMEOUT = 5
+PHASES = ('dns', 'tcp', 'proxy', 'tls', 'ttfb')
+PHASE_LABELS = {'dns': 'DNS', 'tcp': 'TCP', 'proxy': 'PROXY', 'tls': 'TLS', 'ttfb': 'TTFB',
+                'download': 'descarga'}
+
+
+class CheckResult:
+    """
+    Resultado estructurado de una verificación.
+
+    `check` identifica la verificación (p. ej. 'dns' o 'http'), `target` el
+    dominio, puerto o recurso verificado y `status` uno de 'ok', 'warning',
+    'fail', 'timeout' o 'error'. `message` es el texto mostrado al usuario e
+    `issues` los problemas que aporta al informe.
+    """
+    __slots__ = ('check', 'target', 'status', 'message', 'issues', 'timings', 'error', 'timestamp',
+                 'cached')
+
+    def __init__(self, check, target, status, message='', issues=(), timings=None, error=None):
+        self.check = check
+        self.target = target
+        self.status = status
+        self.message = message
+        self.issues = list(issues)
+        self.timings = timings or {}
+        self.error = error
+        self.timestamp = time.time()
+        self.cached = False
+
+    def to_dict(self, include_message=False):
+        """
+        Representación serializable; el mensaje de texto solo se incluye si se pide.
+        """
+        data = {'ts': round(self.timestamp, 3), 'check': self.check, 'target': self.target,
+                'status': self.status, 'timings': self.timings, 'error': self.error,
+                'issues': self.issues, 'cached': self.cached}
+        if include_message:
+            data['message'] = self.message
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Reconstruye un resultado a partir de `to_dict`.
+        """
+        result = cls(data['check'], data['target'], data['status'], data.get('message', ''),
+                     data.get('issues', ()), data.get('timings'), data.get('error'))
+        result.timestamp = data.get('ts', result.timestamp)
+        result.cached = data.get('cached', False)
+        return result
+
+
+class ProbeEngine:
+    """
+    Ejecuta sondeos de red en paralelo sobre un pool de hilos acotado.
+
+    Todos los sondeos comparten un único plazo global: los que no terminan a
+    tiempo se informan como expirados y el diagnóstico continúa sin esperarlos.
+    """
+
+    def __init__(self, max_workers=MAX_PROBE_WORKERS, deadline=PROBE_DEADLINE):
+        self.max_workers = max_workers
+        self.deadline = deadline
+
+    def run(self, probes, on_result=None):
+        """
+        Ejecuta los sondeos y devuelve sus resultados en el orden original.
+
+        `probes` es una lista de tuplas (verificación, objetivo, función); cada
+        función devuelve un `CheckResult`. `on_result` recibe cada resultado en
+        cuanto su sondeo termina.
+        """
+        results = [None] * len(probes)
+        executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                      thread_name_prefix="sondeo")
+        try:
+            pending = {executor.submit(func): i for i, (_, _, func) in enumerate(probes)}
+            end = time.monotonic() + self.deadline
+            while pending:
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = pending.pop(future)
+                    check, target, _ = probes[i]
+                    try:
+                        results[i] = future.result()
+                    except Exception as e:
+                        logger.error(f"Error en el sondeo {check} {target}: {str(e)}", exc_info=True)
+                        results[i] = CheckResult(check, target, 'error',
+                                                 f"❌ Error en el sondeo {check} {target}: {str(e)}",
+                                                 [f"Error en el sondeo {check} {target}"],
+                                                 error=type(e).__name__)
+                    if on_result:
+                        on_result(results[i])
+            for future, i in pending.items():
+                future.cancel()
+                check, target, _ = probes[i]
+                results[i] = CheckResult(check, target, 'timeout',
+                                         f"⏱️ Sondeo {check} {target} sin respuesta tras {self.deadline} s",
+                                         [f"Tiempo de espera agotado en {check} {target}"],
+                                         error='TimeoutError')
+                if on_result:
+                    on_result(results[i])
+        finally:
+            # No esperar a los sondeos bloqueados: el plazo global ya expiró
+            executor.shutdown(wait=False, cancel_futures=True)
+        return results
+
+
+# Comandos externos: plazo por defecto (segundos) y salida máxima conservada por comando
+COMMAND_TIMEOUT = 30
+COMMAND_OUTPUT_LIMIT = 256 * 1024
+CODE_CLI_TIMEOUT = 15
+CODE_CLI_CACHE_TTL = 30
+
+CommandResult = namedtuple('CommandResult', ['args', 'returncode', 'output', 'elapsed', 'timed_out'])
+
+
+class CommandError(Exception):
+    """
+    Error de un comando externo; `result` contiene su `CommandResult`.
+    """
+
+    def __init__(self, result):
+        self.result = result
+        if result.returncode is None:
+            reason = f"no se pudo ejecutar: {result.output}" if result.output else "no se encontró en el PATH"
+        elif result.timed_out:
+            reason = f"no terminó tras {result.elapsed:.0f} s y se detuvo"
+        else:
+            reason = f"terminó con código {result.returncode}"
+        super().__init__(f"El comando '{' '.join(result.args)}' {reason}")
+
+
+class CommandRunner:
+    """
+    Ejecuta comandos externos sin shell y con un plazo por comando.
+
+    Los comandos se pasan como lista de argumentos. Si un comando no termina a
+    tiempo se mata su grupo de procesos y se informa como expirado. La salida
+    se lee línea a línea y se entrega a `on_line` mientras el comando avanza.
+    """
+
+    def __init__(self, timeout=COMMAND_TIMEOUT, max_workers=4):
+        self.timeout = timeout
+        self.max_workers = max_workers
+
+    def run(self, args, timeout=None, check=True, on_line=None):
+        """
+        Ejecuta `args` y devuelve su `CommandResult`.
+
+        Con `check`, lanza `CommandError` si el comando no existe, expira o
+        termina con un código distinto de cero.
+        """
+        result = self._execute(list(args), self.timeout if timeout is None else timeout, on_line)
+        if check and result.returncode != 0:
+            raise CommandError(result)
+        return result
+
+    def run_many(self, commands, timeout=None, check=True, on_line=None):
+        """
+        Ejecuta en paralelo comandos independientes y devuelve sus resultados
+        en el orden original. Con `check`, lanza `CommandError` por el primer
+        comando fallido una vez que todos han terminado.
+        """
+        if not commands:
+            return []
+        timeout = self.timeout if timeout is None else timeout
+        with ThreadPoolExecutor(max_workers=min(len(commands), self.max_workers),
+                                thread_name_prefix="comando") as pool:
+            results = list(pool.map(lambda args: self._execute(list(args), timeout, on_line), commands))
+        for result in results:
+            if check and result.returncode != 0:
+                raise CommandError(result)
+        return results
+
+    def _execute(self, args, timeout, on_line):
+        start = time.monotonic()
+        # Sin shell hay que resolver el ejecutable (en Windows, code.cmd)
+        executable = shutil.which(args[0])
+        if executable is None:
+            return CommandResult(tuple(args), None, '', 0.0, False)
+        if sys.platform == 'win32':
+            options = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.CREATE_NO_WINDOW}
+        else:
+            options = {'start_new_session': True}
+        try:
+            process = subprocess.Popen([executable] + args[1:], stdin=subprocess.DEVNULL,
+                                       stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                       text=True, errors='replace', **options)
+        except OSError as e:
+            return CommandResult(tuple(args), None, str(e), time.monotonic() - start, False)
+        lines = []
+
+        def read():
+            size = 0
+            for line in process.stdout:
+                if size < COMMAND_OUTPUT_LIMIT:
+                    lines.append(line)
+                    size += len(line)
+                if on_line and line.strip():
+                    on_line(line.rstrip('\r\n'))
+
+        reader = threading.Thread(target=read, name=f"salida-{args[0]}", daemon=True)
+        reader.start()
+        timed_out = False
+        try:
+            returncode = process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            timed_out = True
+            self._kill(process)
+            returncode = process.wait()
+            logger.warning(f"Comando '{' '.join(args)}' detenido tras {timeout} s sin terminar")
+        # Un proceso nieto que herede la salida no debe bloquear al llamador
+        reader.join(timeout=1)
+        return CommandResult(tuple(args), returncode, ''.join(lines), time.monotonic() - start, timed_out)
+
+    @staticmethod
+    def _kill(process):
+        """
+        Mata el proceso junto con los procesos que haya lanzado.
+        """
+        try:
+            if sys.platform == 'win32':
+                subprocess.run(['taskkill', '/F', '/T', '/PID', str(process.pid)],
+                               capture_output=True, timeout=5)
+            else:
+                os.killpg(process.pid, signal.SIGKILL)
+        except (OSError, subprocess.SubprocessError):
+            pass
+        try:
+            process.kill()
+        except OSError:
+            pass
+
+
+class FakeCommandRunner(CommandRunner):
+    """
+    Sustituto de `CommandRunner` para pruebas y simulaciones: registra los
+    comandos y devuelve las salidas preparadas sin ejecutar nada.
+
+    `outputs`, `failures` y `timeouts` usan como clave la tupla de argumentos.
+    """
+
+    def __init__(self, outputs=None, failures=None, timeouts=()):
+        super().__init__(max_workers=1)
+        self.commands = []
+        self.outputs = outputs or {}
+        self.failures = failures or {}
+        self.timeouts = set(timeouts)
+
+    def _execute(self, args, timeout, on_line):
+        self.commands.append(args)
+        key = tuple(args)
+        if key in self.timeouts:
+            return CommandResult(key, -9, '', float(timeout), True)
+        output = self.outputs.get(key, '')
+        if on_line:
+            for line in output.splitlines():
+                if line.strip():
+                    on_line(line)
+        return CommandResult(key, self.failures.get(key, 0), output, 0.0, False)
+
+
+command_runner = CommandRunner()
+
+
+class PlatformCommands:
+    """
+    Comandos de corrección del sistema operativo.
+
+    Cada remedio devuelve una lista de grupos: los grupos se ejecutan en orden
+    y los comandos de un mismo grupo son independientes y se lanzan en
+    paralelo. Una lista vacía indica que el remedio no existe en la plataforma.
+    `descriptions` da el texto de cada remedio en el plan de correcciones.
+    """
+    name = 'genérico'
+    descriptions = {
+        'flush_dns': "Limpiar la caché DNS",
+        'adapter_bounce': "Reconfigurar el adaptador de red",
+        'network_reset': "Restablecer la configuración de red y reconfigurar el adaptador",
+    }
+
+    def flush_dns(self):
+        return []
+
+    def network_reset(self):
+        return []
+
+    def list_adapters(self):
+        return None
+
+    def parse_adapter(self, output):
+        return None
+
+    def adapter_bounce(self, adapter):
+        return []
+
+    def restart(self, delay, message):
+        return ['shutdown', '-r', f'+{max(1, round(delay / 60))}', message]
+
+    def restart_extension_host(self):
+        return ['code', '--command', 'workbench.action.restartExtensionHost']
+
+
+class WindowsCommands(PlatformCommands):
+    name = 'Windows'
+    descriptions = dict(PlatformCommands.descriptions,
+                        network_reset="Restablecer TCP/IP y Winsock y reconfigurar el adaptador")
+
+    def flush_dns(self):
+        return [[['ipconfig', '/flushdns']]]
+
+    def network_reset(self):
+        return [[['netsh', 'int', 'ip', 'reset'], ['netsh', 'winsock', 'reset']]]
+
+    def list_adapters(self):
+        return ['netsh', 'interface', 'show', 'interface']
+
+    def parse_adapter(self, output):
+        # Estado admin.  Estado  Tipo  Nombre de interfaz
+        for line in output.splitlines():
+            fields = line.split(None, 3)
+            if (len(fields) == 4 and fields[0] in ('Enabled', 'Habilitado')
+                    and fields[1] in ('Connected', 'Conectado') and 'Virtual' not in fields[3]):
+                return fields[3].strip()
+        return None
+
+    def adapter_bounce(self, adapter):
+        return [[['netsh', 'interface', 'set', 'interface', f'name={adapter}', 'admin=disabled']],
+                [['netsh', 'interface', 'set', 'interface', f'name={adapter}', 'admin=enabled']]]
+
+    def restart(self, delay, message):
+        return ['shutdown', '/r', '/t', str(delay), '/c', message]
+
+
+class LinuxCommands(PlatformCommands):
+    """
+    Comandos de NetworkManager.
+
+    Ningún remedio desconecta la red, ni siquiera un momento: el diagnóstico
+    suele ejecutarse por SSH y, si la sesión se cae entre un "off" y un "on",
+    el equipo se queda sin red.
+    """
+    name = 'Linux'
+    descriptions = dict(PlatformCommands.descriptions,
+                        adapter_bounce="Volver a aplicar la conexión del adaptador de red",
+                        network_reset="Recargar la configuración de NetworkManager y volver a aplicar "
+                                      "la conexión del adaptador")
+
+    def flush_dns(self):
+        if shutil.which('resolvectl'):
+            return [[['resolvectl', 'flush-caches']]]
+        if shutil.which('systemd-resolve'):
+            return [[['systemd-resolve', '--flush-caches']]]
+        return []
+
+    def network_reset(self):
+        return [[['nmcli', 'general', 'reload']]]
+
+    def list_adapters(self):
+        return ['nmcli', '-t', '-f', 'DEVICE,TYPE,STATE', 'device']
+
+    def parse_adapter(self, output):
+        # DEVICE:TYPE:STATE
+        for line in output.splitlines():
+            fields = line.strip().split(':')
+            if len(fields) >= 3 and fields[1] in ('ethernet', 'wifi') and fields[2] == 'connected':
+                return fields[0]
+        return None
+
+    def adapter_bounce(self, adapter):
+        return [[['nmcli', 'device', 'reapply', adapter]]]
+
+
+class MacCommands(PlatformCommands):
+    name = 'macOS'
+
+    def flush_dns(self):
+        return [[['dscacheutil', '-flushcache'], ['killall', '-HUP', 'mDNSResponder']]]
+
+    def list_adapters(self):
+        return ['networksetup', '-listallnetworkservices']
+
+    def parse_adapter(self, output):
+        # La primera línea es una nota; los servicios deshabilitados empiezan por '*'
+        for line in output.splitlines()[1:]:
+            if line.strip() and not line.startswith('*'):
+                return line.strip()
+        return None
+
+    def adapter_bounce(self, adapter):
+        return [[['networksetup', '-setnetworkserviceenabled', adapter, 'off']],
+                [['networksetup', '-setnetworkserviceenabled', adapter, 'on']]]
+
+
+def platform_commands(platform=None):
+    """
+    Devuelve los comandos de corrección de la plataforma indicada (por defecto, la actual).
+    """
+    platform = platform or sys.platform
+    if platform == 'win32':
+        return WindowsCommands()
+    if platform == 'darwin':
+        return MacCommands()
+    if platform.startswith('linux'):
+        return LinuxCommands()
+    return PlatformCommands()
+
+
+class ProbePhaseError(Exception):
+    """
+    Error de un sondeo HTTP que indica en qué fase se produjo.
+    """
+
+    def __init__(self, phase, error):
+        super().__init__(f"fase {PHASE_LABELS[phase]}: {error}")
+        self.phase = phase
+        self.error = error
+
+
+class ProbeConnectionPool:
+    """
+    Conexiones TLS keep-alive inactivas, agrupadas por (host, puerto).
+
+    Los sondeos toman una conexión inactiva si la hay y la devuelven al
+    terminar; las que superan el límite por host o llevan demasiado tiempo
+    inactivas se cierran.
+    """
+
+    def __init__(self, max_idle_per_host=HTTP_PROBE_SAMPLES, idle_timeout=POOL_IDLE_TIMEOUT):
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout = idle_timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, host, port):
+        """
+        Devuelve una conexión inactiva para (host, puerto) o None.
+        """
+        expired = []
+        sock = None
+        with self._lock:
+            idle = self._idle.get((host, port), [])
+            now = time.monotonic()
+            while idle:
+                candidate, released_at = idle.pop()
+                if now - released_at < self.idle_timeout:
+                    sock = candidate
+                    break
+                expired.append(candidate)
+        for candidate in expired:
+            candidate.close()
+        return sock
+
+    def release(self, host, port, sock):
+        """
+        Devuelve una conexión al pool o la cierra si ya está lleno.
+        """
+        with self._lock:
+            idle = self._idle.setdefault((host, port), [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append((sock, time.monotonic()))
+                return
+        sock.close()
+
+    def close_all(self):
+        """
+        Cierra todas las conexiones inactivas.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for sock, _ in connections:
+                sock.close()
+
+
+probe_pool = ProbeConnectionPool()
+
+
+ProxyConfig = namedtuple('ProxyConfig', ['url', 'host', 'port', 'auth', 'source', 'strict_ssl', 'no_proxy'])
+
+# Comentarios y comas finales del JSON con comentarios de VS Code; las
+# cadenas se capturan para no tocar su contenido
+_JSONC_COMMENTS = re.compile(r'("(?:\\.|[^"\\])*")|//[^\n]*|/\*.*?\*/', re.DOTALL)
+_JSONC_TRAILING_COMMAS = re.compile(r'("(?:\\.|[^"\\])*")|,(?=\s*[}\]])')
+
+
+def load_jsonc(text):
+    """
+    Interpreta el JSON con comentarios y comas finales que admite VS Code.
+    """
+    for pattern in (_JSONC_COMMENTS, _JSONC_TRAILING_COMMAS):
+        text = pattern.sub(lambda match: match.group(1) or '', text)
+    return json.loads(text)
+
+
+def discover_proxy(settings_path=None):
+    """
+    Devuelve el proxy HTTP que usaría la extensión, o None si no hay ninguno.
+
+    Como VS Code, `http.proxy` de settings.json tiene prioridad sobre
+    HTTPS_PROXY/HTTP_PROXY (o la configuración del sistema que devuelve
+    `getproxies`); `http.proxyStrictSSL` y NO_PROXY se respetan.
+    """
+    settings = {}
+    path = settings_path or vscode_settings_path()
+    try:
+        with open(path, encoding='utf-8') as f:
+            settings = load_jsonc(f.read())
+    except OSError:
+        pass
+    except ValueError as e:
+        logger.warning(f"No se pudo interpretar {path}: {str(e)}")
+    if not isinstance(settings, dict):
+        settings = {}
+
+    proxies = getproxies()
+    if settings.get('http.proxy'):
+        url, source = settings['http.proxy'], 'settings.json (http.proxy)'
+    elif proxies.get('https'):
+        url, source = proxies['https'], 'HTTPS_PROXY'
+    elif proxies.get('http'):
+        url, source = proxies['http'], 'HTTP_PROXY'
+    else:
+        return None
+    parts = urlsplit(url if '://' in url else f"http://{url}")
+    if parts.scheme != 'http' or not parts.hostname:
+        logger.warning(f"Proxy no compatible con el sondeo ({source}): {parts.scheme}://{parts.hostname}")
+        return None
+    try:
+        port = parts.port or 80
+    except ValueError:
+        logger.warning(f"Puerto de proxy no válido ({source}): {url}")
+        return None
+    auth = None
+    if parts.username:
+        credentials = f"{unquote(parts.username)}:{unquote(parts.password or '')}"
+        auth = base64.b64encode(credentials.encode('utf-8')).decode('ascii')
+    no_proxy = tuple(entry.strip().lower() for entry in proxies.get('no', '').split(',') if entry.strip())
+    return ProxyConfig(f"http://{parts.hostname}:{port}", parts.hostname, port, auth, source,
+                       settings.get('http.proxyStrictSSL', True) is not False, no_proxy)
+
+
+def proxy_applies(proxy, host):
+    """
+    Indica si las conexiones a `host` pasan por `proxy` según NO_PROXY.
+    """
+    if proxy is None:
+        return False
+    host = host.lower()
+    for entry in proxy.no_proxy:
+        if entry == '*':
+            return False
+        entry = entry.rsplit(':', 1)[0] if entry.count(':') == 1 else entry
+        entry = entry.lstrip('*').lstrip('.')
+        if host == entry or host.endswith('.' + entry):
+            return False
+    return True
+
+
+def proxy_pool_key(host, proxy=None):
+    """
+    Clave del pool de conexiones: las conexiones por proxy no se mezclan con las directas.
+    """
+    return host if proxy is None else f"{host} vía {proxy.host}:{proxy.port}"
+
+
+def open_proxy_tunnel(sock, host, port, proxy):
+    """
+    Pide al proxy un túnel CONNECT hacia (host, puerto) sobre `sock`.
+    """
+    request = f"CONNECT {host}:{port} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+    if proxy.auth:
+        request += f"Proxy-Authorization: Basic {proxy.auth}\r\n"
+    sock.sendall((request + "\r\n").encode('ascii'))
+    data = b''
+    while b'\r\n\r\n' not in data:
+        chunk = sock.recv(MAX_PROBE_RESPONSE_BYTES - len(data))
+        if not chunk:
+            raise ConnectionError("el proxy cerró la conexión sin responder al CONNECT")
+        data += chunk
+        if len(data) >= MAX_PROBE_RESPONSE_BYTES:
+            raise ConnectionError("respuesta del proxy demasiado grande")
+    match = re.match(rb'HTTP/\d(?:\.\d)? (\d{3})', data)
+    status = int(match.group(1)) if match else None
+    if status == 407:
+        raise PermissionError("el proxy exige autenticación (407)")
+    if status != 200:
+        raise ConnectionError(f"el proxy rechazó el CONNECT (HTTP {status})")
+
+
+def open_https_connection(host, port=443, timeout=PROBE_TIMEOUT, ssl_context=None, proxy=None):
+    """
+    Abre una conexión TLS midiendo las fases DNS, TCP y TLS.
+
+    Con `proxy`, DNS y TCP corresponden al proxy, la fase 'proxy' mide el
+    túnel CONNECT y el TLS se negocia con el destino a través del túnel; si
+    `proxy.strict_ssl` es falso no se verifica el certificado, como hace VS
+    Code con `http.proxyStrictSSL: false`. Devuelve (socket, {fase: segundos}).
+    """
+    timings = {}
+    phase = 'dns'
+    sock = None
+    try:
+        start = time.perf_counter()
+        addrinfo = socket.getaddrinfo(proxy.host if proxy else host, proxy.port if proxy else port,
+                                      type=socket.SOCK_STREAM)
+        timings['dns'] = time.perf_counter() - start
+
+        phase = 'tcp'
+        family, socktype, proto, _, address = addrinfo[0]
+        sock = socket.socket(family, socktype, proto)
+        sock.settimeout(timeout)
+        start = time.perf_counter()
+        sock.connect(address)
+        timings['tcp'] = time.perf_counter() - start
+
+        if proxy:
+            phase = 'proxy'
+            start = time.perf_counter()
+            open_proxy_tunnel(sock, host, port, proxy)
+            timings['proxy'] = time.perf_counter() - start
+
+        phase = 'tls'
+        context = ssl_context
+        if context is None:
+            context = ssl.create_default_context()
+            if proxy and not proxy.strict_ssl:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+        start = time.perf_counter()
+        sock = context.wrap_socket(sock, server_hostname=host)
+        timings['tls'] = time.perf_counter() - start
+    except Exception as e:
+        if sock is not None:
+            sock.close()
+        raise ProbePhaseError(phase, e) from e
+    return sock, timings
+
+
+def send_probe_request(sock, host, path='/', method='HEAD'):
+    """
+    Envía una petición keep-alive y lee solo la cabecera de la respuesta.
+
+    Nunca lee más de MAX_PROBE_RESPONSE_BYTES. Devuelve (código_de_estado,
+    segundos_hasta_el_primer_byte, conexión_reutilizable).
+    """
+    request = (f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"
+               f"User-Agent: DiagnosticosCodegpt\r\nConnection: keep-alive\r\n\r\n")
+    start = time.perf_counter()
+    sock.sendall(request.encode('ascii'))
+    data = sock.recv(MAX_PROBE_RESPONSE_BYTES)
+    ttfb = time.perf_counter() - start
+    if not data:
+        raise ConnectionError("el servidor cerró la conexión sin responder")
+    while b'\r\n\r\n' not in data and len(data) < MAX_PROBE_RESPONSE_BYTES:
+        chunk = sock.recv(MAX_PROBE_RESPONSE_BYTES - len(data))
+        if not chunk:
+            break
+        data += chunk
+
+    head, complete, _ = data.partition(b'\r\n\r\n')
+    match = re.match(rb'HTTP/(\d(?:\.\d)?) (\d{3})', head)
+    status = int(match.group(2)) if match else None
+    headers = head.lower()
+    reusable = (bool(complete) and match is not None and match.group(1) == b'1.1'
+                and method == 'HEAD' and b'\r\nconnection: close' not in headers)
+    return status, ttfb, reusable
+
+
+def classify_http_status(status):
+    """
+    Clasifica el código de estado de un sondeo.
+
+    Devuelve 'ok' para 2xx, 3xx y HTTP_REACHABLE_STATUSES, 'fail' para 5xx o
+    una respuesta que no es HTTP, y 'warning' para el resto de 4xx.
+    """
+    if status is None or status >= 500:
+        return 'fail'
+    if status < 400 or status in HTTP_REACHABLE_STATUSES:
+        return 'ok'
+    return 'warning'
+
+
+def measure_https_phases(host, port=443, path='/', timeout=PROBE_TIMEOUT, ssl_context=None,
+                         pool=None, method='HEAD', proxy=None):
+    """
+    Realiza una petición HTTPS midiendo por separado cada fase de la conexión.
+
+    Si `pool` tiene una conexión inactiva para el host, se reutiliza y solo se
+    mide el tiempo hasta el primer byte (TTFB). Devuelve (código_de_estado,
+    {fase: segundos}, reutilizada, socket_reutilizable_o_None); quien llama
+    debe devolver el socket al pool, con la clave `proxy_pool_key`, o cerrarlo.
+    """
+    sock = pool.acquire(proxy_pool_key(host, proxy), port) if pool else None
+    if sock is not None:
+        try:
+            status, ttfb, reusable = send_probe_request(sock, host, path, method)
+        except Exception:
+            # El servidor cerró la conexión inactiva: abrir una nueva
+            sock.close()
+        else:
+            if not reusable:
+                sock.close()
+                sock = None
+            return status, {'ttfb': ttfb}, True, sock
+
+    sock, timings = open_https_connection(host, port, timeout, ssl_context, proxy)
+    try:
+        status, timings['ttfb'], reusable = send_probe_request(sock, host, path, method)
+    except Exception as e:
+        sock.close()
+        raise ProbePhaseError('ttfb', e) from e
+    if not reusable:
+        sock.close()
+        sock = None
+    return status, timings, False, sock
+
+
+def percentile(values, pct):
+    """
+    Percentil por rango más cercano de una lista de valores.
+    """
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def sample_https_phases(host, samples=HTTP_PROBE_SAMPLES, pool=None, **kwargs):
+    """
+    Repite `measure_https_phases` y resume cada fase con p50/p95/máx.
+
+    Cada conexión vuelve a `pool` en cuanto termina su muestra: la primera
+    muestra abre la conexión (y mide DNS, TCP y TLS) y las siguientes la
+    reutilizan y solo miden el TTFB. Sin `pool`, cada muestra abre su propia
+    conexión. Por eso cada fase lleva su propio número de muestras, y con una
+    sola los tres valores coinciden. Devuelve (último_código_de_estado,
+    {fase: (p50, p95, máx, muestras)}, muestras_reutilizadas). Si una muestra
+    falla, se propaga el `ProbePhaseError` correspondiente.
+    """
+    collected = {phase: [] for phase in PHASES}
+    status = None
+    reused_count = 0
+    for _ in range(samples):
+        status, timings, reused, sock = measure_https_phases(host, pool=pool, **kwargs)
+        reused_count += reused
+        if sock is not None:
+            if pool:
+                pool.release(proxy_pool_key(host, kwargs.get('proxy')), kwargs.get('port', 443), sock)
+            else:
+                sock.close()
+        for phase, value in timings.items():
+            collected[phase].append(value)
+    stats = {phase: (percentile(values, 50), percentile(values, 95), max(values), len(values))
+             for phase, values in collected.items() if values}
+    return status, stats, reused_count
+
+
+def format_phase_stats(stats):
+    """
+    Formatea las estadísticas por fase en milisegundos para el informe.
+
+    Las fases medidas una sola vez (DNS, TCP y TLS con conexiones
+    reutilizadas) se muestran como un único valor, sin percentiles.
+    """
+    lines = []
+    for phase in PHASES:
+        if phase not in stats:
+            continue
+        p50, p95, peak, count = stats[phase]
+        if count == 1:
+            lines.append(f"   {PHASE_LABELS[phase]:<5} {p50 * 1000:7.1f} ms (1 muestra)")
+        else:
+            lines.append(f"   {PHASE_LABELS[phase]:<5} p50 {p50 * 1000:7.1f} ms · "
+                         f"p95 {p95 * 1000:7.1f} ms · máx {peak * 1000:7.1f} ms ({count} muestras)")
+    return "\n".join(lines)
+
+
+def measure_throughput(url, max_bytes=THROUGHPUT_MAX_BYTES, max_seconds=THROUGHPUT_MAX_SECONDS,
+                       chunk_size=THROUGHPUT_CHUNK, stall=THROUGHPUT_STALL, timeout=PROBE_TIMEOUT,
+                       ssl_context=None, proxy=None):
+    """
+    Descarga como máximo `max_bytes` de `url` durante `max_seconds` y mide la
+    velocidad sostenida.
+
+    El cuerpo se lee en bloques de `chunk_size` sobre un único buffer
+    reutilizado y se descarta, así que la memoria no crece con la descarga.
+    Cada pausa sin datos de al menos `stall` segundos cuenta como un atasco.
+    Devuelve un dict con status, bytes, seconds, throughput (bytes/s desde el
+    primer byte del cuerpo), stalls, stalled y los tiempos de cada fase.
+    """
+    parts = urlsplit(url)
+    if parts.scheme != 'https' or not parts.hostname:
+        raise ValueError(f"solo se admiten URL https: {url}")
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+    sock, timings = open_https_connection(parts.hostname, parts.port or 443, timeout, ssl_context, proxy)
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    # Antes del try: si el envío de la petición falla, el manejador de errores
+    # consulta `first` para saber en qué fase se cortó la conexión
+    head = b''
+    body = 0
+    first = last = None
+    try:
+        request = (f"GET {path} HTTP/1.1\r\nHost: {parts.hostname}\r\n"
+                   f"User-Agent: DiagnosticosCodegpt\r\nAccept-Encoding: identity\r\n"
+                   f"Connection: close\r\n\r\n")
+        start = time.perf_counter()
+        deadline = start + max_seconds
+        sock.sendall(request.encode('ascii'))
+        stalls = 0
+        stalled = 0.0
+        length = None
+        timed_out = False
+        while body < max_bytes:
+            now = time.perf_counter()
+            if now >= deadline:
+                timed_out = True
+                break
+            sock.settimeout(deadline - now)
+            try:
+                count = sock.recv_into(view, min(chunk_size, max_bytes - body))
+            except socket.timeout:
+                timed_out = True
+                break
+            if not count:
+                if not head:
+                    raise ConnectionError("el servidor cerró la conexión sin responder")
+                break
+            now = time.perf_counter()
+            if last is not None and now - last >= stall:
+                stalls += 1
+                stalled += now - last
+            last = now
+            if first is None:
+                timings['ttfb'] = now - start
+            if length is None and b'\r\n\r\n' not in head:
+                # Solo la cabecera se copia, y como mucho MAX_PROBE_RESPONSE_BYTES
+                head += bytes(view[:count])
+                if b'\r\n\r\n' not in head:
+                    if len(head) > MAX_PROBE_RESPONSE_BYTES:
+                        raise ProbePhaseError('ttfb', ValueError("cabecera HTTP demasiado grande"))
+                    continue
+                header, _, rest = head.partition(b'\r\n\r\n')
+                match = re.search(rb'\r\ncontent-length:\s*(\d+)', header, re.IGNORECASE)
+                length = int(match.group(1)) if match else -1
+                count = len(rest)
+            if first is None:
+                first = now
+            body += count
+            if 0 <= length <= body:
+                break
+        end = last or start
+        # Una pausa sin datos hasta el final del plazo también es un atasco
+        if timed_out and first is not None and time.perf_counter() - end >= stall:
+            stalls += 1
+            stalled += time.perf_counter() - end
+    except ProbePhaseError:
+        raise
+    except Exception as e:
+        raise ProbePhaseError('ttfb' if first is None else 'download', e) from e
+    finally:
+        sock.close()
+    match = re.match(rb'HTTP/\d(?:\.\d)? (\d{3})', head)
+    seconds = end - first if first is not None else 0.0
+    return {
+        'status': int(match.group(1)) if match else None,
+        'bytes': body,
+        'seconds': seconds,
+        'throughput': body / seconds if seconds > 0 else 0.0,
+        'stalls': stalls,
+        'stalled': stalled,
+        'timings': timings,
+    }
+
+
+class DnsCache:
+    """
+    Caché en memoria de respuestas DNS que respeta el TTL de cada respuesta.
+
+    Las claves son (resolvedor, nombre, tipo) y los valores la lista de
+    direcciones junto con la latencia de la consulta original.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, resolver, name, qtype):
+        """
+        Devuelve (direcciones, latencia) si la entrada sigue vigente, o None.
+        """
+        key = (resolver, name, qtype)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, addresses, latency = entry
+            if time.monotonic() >= expires:
+                del self._entries[key]
+                return None
+            return addresses, latency
+
+    def put(self, resolver, name, qtype, addresses, latency, ttl):
+        """
+        Guarda una respuesta durante `ttl` segundos.
+        """
+        with self._lock:
+            self._entries[(resolver, name, qtype)] = (time.monotonic() + ttl, addresses, latency)
+
+    def invalidate(self, name):
+        """
+        Descarta todas las respuestas guardadas para `name`.
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == name]:
+                del self._entries[key]
+
+
+dns_cache = DnsCache()
+
+
+def parse_resolver(resolver):
+    """
+    Convierte "ip", "ip:puerto" o "[ipv6]:puerto" en (familia, ip, puerto).
+
+    Lanza ValueError si la dirección o el puerto no son válidos.
+    """
+    match = re.fullmatch(r'\[(.+)\](?::(\d+))?', resolver)
+    if match:
+        family, host, port = socket.AF_INET6, match.group(1), match.group(2)
+    elif resolver.count(':') > 1:
+        family, host, port = socket.AF_INET6, resolver, None
+    else:
+        family = socket.AF_INET
+        host, _, port = resolver.partition(':')
+    try:
+        # El identificador de zona de IPv6 ("fe80::1%eth0") no forma parte de la dirección
+        socket.inet_pton(family, host.split('%', 1)[0])
+    except OSError:
+        raise ValueError(f"dirección IP no válida: {host!r}") from None
+    if not port:
+        return family, host, 53
+    if not port.isdigit() or not 0 < int(port) < 65536:
+        raise ValueError(f"puerto no válido: {port!r}")
+    return family, host, int(port)
+
+
+def resolver_argument(value):
+    """
+    Tipo de argparse para --dns-resolver: valida el resolvedor al leer la línea de comandos.
+    """
+    try:
+        parse_resolver(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"resolvedor DNS no válido {value!r}: {str(e)}") from None
+    return value
+
+
+def build_dns_query(name, qtype, query_id):
+    """
+    Construye una consulta DNS estándar con recursión solicitada.
+    """
+    header = struct.pack('!HHHHHH', query_id, 0x0100, 1, 0, 0, 0)
+    qname = b''.join(bytes([len(label)]) + label
+                     for label in name.rstrip('.').encode('idna').split(b'.')) + b'\0'
+    return header + qname + struct.pack('!HH', qtype, 1)
+
+
+def _skip_dns_name(data, offset):
+    """
+    Devuelve la posición que sigue a un nombre DNS (posiblemente comprimido).
+    """
+    while True:
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            return offset + 2
+        offset += 1
+        if length == 0:
+            return offset
+        offset += length
+
+
+def parse_dns_response(data, qtype):
+    """
+    Extrae las direcciones del tipo pedido y el TTL mínimo de una respuesta DNS.
+
+    Devuelve (id, rcode, direcciones, ttl); el TTL es None si no hay direcciones.
+    """
+    query_id, flags, qdcount, ancount = struct.unpack('!HHHH', data[:8])
+    offset = 12
+    for _ in range(qdcount):
+        offset = _skip_dns_name(data, offset) + 4
+    addresses = []
+    ttl = None
+    family = socket.AF_INET if qtype == DNS_QTYPES['A'] else socket.AF_INET6
+    for _ in range(ancount):
+        offset = _skip_dns_name(data, offset)
+        rtype, _, record_ttl, rdlength = struct.unpack('!HHIH', data[offset:offset + 10])
+        offset += 10
+        if rtype == qtype:
+            addresses.append(socket.inet_ntop(family, data[offset:offset + rdlength]))
+            ttl = record_ttl if ttl is None else min(ttl, record_ttl)
+        offset += rdlength
+    return query_id, flags & 0x000F, addresses, ttl
+
+
+def resolve_system(name):
+    """
+    Resuelve un nombre con el resolvedor del sistema.
+
+    Devuelve ({'A': [...], 'AAAA': [...]}, segundos).
+    """
+    start = time.perf_counter()
+    infos = socket.getaddrinfo(name, None, type=socket.SOCK_STREAM)
+    latency = time.perf_counter() - start
+    answers = {'A': [], 'AAAA': []}
+    for family, _, _, _, address in infos:
+        qtype = 'A' if family == socket.AF_INET else 'AAAA'
+        if address[0] not in answers[qtype]:
+            answers[qtype].append(address[0])
+    return answers, latency
+
+
+def query_resolvers(name, resolvers, timeout=DNS_TIMEOUT, cache=None):
+    """
+    Consulta A y AAAA a todos los resolvedores directos en paralelo.
+
+    Todas las consultas se envían a la vez y las respuestas se esperan con un
+    único selector. Devuelve {resolvedor: {'answers', 'latency', 'cached',
+    'error'}}; las respuestas vigentes en `cache` no se vuelven a pedir.
+    """
+    results = {}
+    pending = {}
+    selector = DefaultSelector()
+    try:
+        for resolver in resolvers:
+            result = {'answers': {}, 'latency': 0.0, 'cached': True, 'error': None}
+            results[resolver] = result
+            missing = []
+            for qname, qtype in DNS_QTYPES.items():
+                cached = cache.get(resolver, name, qtype) if cache else None
+                if cached is None:
+                    missing.append((qname, qtype))
+                else:
+                    result['answers'][qname] = cached[0]
+                    result['latency'] = max(result['latency'], cached[1])
+            if not missing:
+                continue
+            result['cached'] = False
+            sock = None
+            try:
+                family, host, port = parse_resolver(resolver)
+                sock = socket.socket(family, socket.SOCK_DGRAM)
+                sock.setblocking(False)
+                sock.connect((host, port))
+                queries = {}
+                for qname, qtype in missing:
+                    query_id = random.getrandbits(16)
+                    queries[query_id] = (qname, qtype)
+                    sock.send(build_dns_query(name, qtype, query_id))
+            except (OSError, ValueError) as e:
+                # Un resolvedor mal escrito o inalcanzable no impide consultar al resto
+                if sock is not None:
+                    sock.close()
+                result['error'] = str(e)
+                continue
+            pending[sock] = (resolver, queries, time.perf_counter())
+            selector.register(sock, EVENT_READ)
+
+        end = time.monotonic() + timeout
+        while pending:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            for key, _ in selector.select(remaining):
+                sock = key.fileobj
+                resolver, queries, sent = pending[sock]
+                result = results[resolver]
+                try:
+                    data = sock.recv(4096)
+                    query_id = struct.unpack('!H', data[:2])[0]
+                    if query_id not in queries:
+                        continue
+                    qname, qtype = queries.pop(query_id)
+                    _, rcode, addresses, ttl = parse_dns_response(data, qtype)
+                except (OSError, struct.error, IndexError, ValueError) as e:
+                    result['error'] = str(e)
+                    queries.clear()
+                else:
+                    latency = time.perf_counter() - sent
+                    result['latency'] = max(result['latency'], latency)
+                    if rcode not in (0, 3):
+                        result['error'] = f"rcode {rcode}"
+                    result['answers'][qname] = addresses
+                    if cache and rcode in (0, 3):
+                        cache.put(resolver, name, qtype, addresses, latency,
+                                  ttl if ttl is not None else NEGATIVE_DNS_TTL)
+                if not queries:
+                    selector.unregister(sock)
+                    sock.close()
+                    del pending[sock]
+        for sock, (resolver, _, _) in pending.items():
+            results[resolver]['error'] = f"sin respuesta tras {timeout} s"
+            sock.close()
+    finally:
+        selector.close()
+    return results
+
+
+def compare_dns_resolvers(name, resolvers=None, timeout=DNS_TIMEOUT, cache=dns_cache):
+    """
+    Resuelve un nombre con el sistema y con los resolvedores directos a la vez.
+
+    Devuelve {resolvedor: resultado} con la clave 'sistema' para el
+    resolvedor del sistema; cada resultado tiene 'answers', 'latency',
+    'cached' y 'error'.
+    """
+    resolvers = DNS_RESOLVERS if resolvers is None else resolvers
+    system = {'answers': {}, 'latency': 0.0, 'cached': False, 'error': None}
+    cached = [cache.get('sistema', name, qname) for qname in DNS_QTYPES] if cache else [None]
+    if all(entry is not None for entry in cached):
+        system['cached'] = True
+        for qname, (addresses, latency) in zip(DNS_QTYPES, cached):
+            system['answers'][qname] = addresses
+            system['latency'] = latency
+
+    def run_system():
+        try:
+            system['answers'], system['latency'] = resolve_system(name)
+            if cache:
+                for qname in DNS_QTYPES:
+                    cache.put('sistema', name, qname, system['answers'][qname],
+                              system['latency'], SYSTEM_DNS_TTL)
+        except OSError as e:
+            system['error'] = str(e)
+            if cache:
+                for qname in DNS_QTYPES:
+                    cache.put('sistema', name, qname, [], 0.0, NEGATIVE_DNS_TTL)
+
+    worker = None
+    if not system['cached']:
+        worker = threading.Thread(target=run_system, name="dns-sistema", daemon=True)
+        worker.start()
+    results = {'sistema': system}
+    results.update(query_resolvers(name, resolvers, timeout, cache))
+    if worker is not None:
+        worker.join(timeout)
+        if worker.is_alive():
+            system['error'] = f"sin respuesta tras {timeout} s"
+    return results
+
+
+def format_dns_comparison(results):
+    """
+    Formatea la comparación de resolvedores, una línea por resolvedor.
+    """
+    lines = []
+    for resolver, result in results.items():
+        if result['error'] and not any(result['answers'].values()):
+            lines.append(f"   {resolver:<15} ❌ {result['error']}")
+            continue
+        latency = "caché" if result['cached'] else f"{result['latency'] * 1000:.1f} ms"
+        answers = " ".join(f"{qname} {','.join(result['answers'].get(qname) or ['-'])}"
+                           for qname in DNS_QTYPES)
+        lines.append(f"   {resolver:<15} {latency:>9}  {answers}")
+    return "\n".join(lines)
+
+
+def uri_to_path(uri):
+    """
+    Convierte una URI file:// (o solo su ruta) en una ruta del sistema de archivos.
+
+    En Windows, VS Code guarda rutas como "/c:/Users/...", que hay que
+    convertir en "c:\\Users\\...".
+    """
+    path = unquote(urlsplit(uri).path if '://' in uri else uri)
+    if re.match(r'^/[A-Za-z]:', path):
+        path = path[1:]
+    return os.path.normpath(path) if path else path
+
+
+class ExtensionInventory:
+    """
+    Índice en memoria de las extensiones instaladas en VS Code.
+
+    Lee directamente los manifiestos del directorio de extensiones
+    (`extensions.json` y el `package.json` de cada extensión) y solo recurre
+    al CLI `code` cuando no hay manifiestos disponibles. El índice se
+    reconstruye únicamente cuando cambia el mtime del directorio; si no hay
+    directorio, la salida del CLI se reutiliza durante CODE_CLI_CACHE_TTL.
+    """
+
+    def __init__(self, extensions_dir=None):
+        self.extensions_dir = extensions_dir or os.environ.get(
+            'VSCODE_EXTENSIONS', os.path.join(os.path.expanduser('~'), '.vscode', 'extensions'))
+        self._cache_key = None
+        self._cli_expires = 0.0
+        self._index = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """
+        Descarta el índice para que la próxima consulta lo reconstruya.
+        """
+        with self._lock:
+            self._cache_key = None
+            self._cli_expires = 0.0
+
+    def _current_key(self):
+        """
+        Calcula la clave de caché a partir de los mtimes del directorio.
+        """
+        try:
+            key = [os.stat(self.extensions_dir).st_mtime_ns]
+        except OSError:
+            return None
+        try:
+            key.append(os.stat(os.path.join(self.extensions_dir, 'extensions.json')).st_mtime_ns)
+        except OSError:
+            key.append(None)
+        return tuple(key)
+
+    def extensions(self):
+        """
+        Devuelve el índice {id_en_minúsculas: (id, versión, ruta)}.
+        """
+        with self._lock:
+            key = self._current_key()
+            if key is not None and key == self._cache_key:
+                return self._index
+            if key is None and self._cache_key is None and time.monotonic() < self._cli_expires:
+                return self._index
+            index = self._read_manifests() if key is not None else {}
+            if not index:
+                index = self._read_cli()
+                self._cli_expires = time.monotonic() + CODE_CLI_CACHE_TTL
+            self._index = index
+            self._cache_key = key
+            return index
+
+    def _read_manifests(self):
+        """
+        Construye el índice a partir de los manifiestos en disco.
+        """
+        index = {}
+        registry = os.path.join(self.extensions_dir, 'extensions.json')
+        try:
+            with open(registry, encoding='utf-8') as file:
+                for entry in json.load(file):
+                    ext_id = entry.get('identifier', {}).get('id')
+                    if not ext_id:
+                        continue
+                    index[ext_id.lower()] = (ext_id, entry.get('version', ''), self._entry_path(entry))
+            return index
+        except (OSError, ValueError, AttributeError) as e:
+            logger.debug(f"No se pudo leer {registry}: {str(e)}")
+
+        # Sin extensions.json: recorrer los package.json de cada extensión
+        try:
+            entries = os.scandir(self.extensions_dir)
+        except OSError:
+            return index
+        with entries:
+            for entry in entries:
+                if not entry.is_dir():
+                    continue
+                try:
+                    with open(os.path.join(entry.path, 'package.json'), encoding='utf-8') as file:
+                        manifest = json.load(file)
+                except (OSError, ValueError):
+                    continue
+                if manifest.get('publisher') and manifest.get('name'):
+                    ext_id = f"{manifest['publisher']}.{manifest['name']}"
+                    index[ext_id.lower()] = (ext_id, manifest.get('version', ''), entry.path)
+        return index
+
+    def _entry_path(self, entry):
+        """
+        Ruta de la extensión de una entrada de extensions.json.
+
+        `relativeLocation` es relativa a la carpeta de extensiones; si falta se
+        usa `location.fsPath` y, como último recurso, la URI de `location`, que
+        las versiones recientes guardan solo con `path` ("/c:/..." en Windows).
+        Devuelve '' si la entrada no indica la ruta.
+        """
+        if entry.get('relativeLocation'):
+            return os.path.join(self.extensions_dir, entry['relativeLocation'])
+        location = entry.get('location') or {}
+        if isinstance(location, str):
+            return uri_to_path(location)
+        if location.get('fsPath'):
+            return location['fsPath']
+        return uri_to_path(location.get('path', ''))
+
+    def _read_cli(self):
+        """
+        Construye el índice con una única llamada al CLI `code`.
+        """
+        index = {}
+        try:
+            result = command_runner.run(['code', '--list-extensions', '--show-versions'],
+                                        timeout=CODE_CLI_TIMEOUT)
+        except CommandError as e:
+            logger.error(f"Error al listar extensiones con el CLI de VS Code: {str(e)}")
+            return index
+        for line in result.output.splitlines():
+            ext_id, _, version = line.strip().partition('@')
+            if ext_id:
+                index[ext_id.lower()] = (ext_id, version, None)
+        return index
+
+    def find(self, text):
+        """
+        Devuelve las extensiones cuyo ID contiene `text` (sin distinguir mayúsculas).
+        """
+        text = text.lower()
+        return [ext for key, ext in sorted(self.extensions().items()) if text in key]
+
+
+extension_inventory = ExtensionInventory()
+
+
+class ExtensionIntegrity:
+    """
+    Verifica que los archivos de una extensión no cambiaron desde la última
+    ejecución sana.
+
+    El manifiesto de referencia (tamaño, mtime y SHA-256 de cada archivo) se
+    guarda en STATE_DIR. Los archivos cuyo tamaño y mtime coinciden con el
+    manifiesto no se vuelven a leer; el resto se calcula en paralelo, con mmap
+    para los archivos grandes. El manifiesto solo se actualiza cuando la
+    extensión está sana, así que un fallo no reemplaza la referencia.
+    """
+
+    def __init__(self, manifest_path=None, workers=INTEGRITY_WORKERS):
+        self.manifest_path = manifest_path or os.path.join(STATE_DIR, 'extension_manifest.json')
+        self.workers = workers
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.manifest_path, encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, manifests):
+        try:
+            os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+            tmp_path = self.manifest_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(manifests, file)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar el manifiesto de la extensión: {str(e)}")
+
+    @staticmethod
+    def _walk(root):
+        """
+        Devuelve {ruta_relativa: (tamaño, mtime_ns)} de los archivos bajo `root`.
+        """
+        files = {}
+        pending = ['']
+        while pending:
+            relative = pending.pop()
+            with os.scandir(os.path.join(root, relative)) as entries:
+                for entry in entries:
+                    path = f"{relative}/{entry.name}" if relative else entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(path)
+                    elif entry.is_file(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        files[path] = (stat.st_size, stat.st_mtime_ns)
+        return files
+
+    @staticmethod
+    def hash_file(path):
+        """
+        Calcula el SHA-256 de un archivo; los grandes se leen con mmap.
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            if size >= INTEGRITY_MMAP_THRESHOLD:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    digest.update(data)
+            elif size:
+                digest.update(file.read())
+        return digest.hexdigest()
+
+    @staticmethod
+    def sanity_problems(root):
+        """
+        Comprueba que package.json se pueda leer y que su archivo `main` exista.
+        """
+        try:
+            with open(os.path.join(root, 'package.json'), encoding='utf-8') as file:
+                manifest = json.load(file)
+        except (OSError, ValueError) as e:
+            return [f"package.json ilegible ({type(e).__name__})"]
+        main = manifest.get('main')
+        if main:
+            candidates = [os.path.join(root, main), os.path.join(root, main + '.js')]
+            if not any(os.path.isfile(path) and os.path.getsize(path) for path in candidates):
+                return [f"falta el punto de entrada {main}"]
+        return []
+
+    def verify(self, ext_id, version, root):
+        """
+        Compara la extensión instalada en `root` con su manifiesto de referencia.
+
+        Devuelve un dict con las listas missing, truncated, changed, added y
+        problems, los contadores files, hashed y skipped, y baseline=True si
+        no había referencia y se acaba de registrar.
+        """
+        key = f"{ext_id.lower()}@{version}"
+        current = self._walk(root)
+        with self._lock:
+            manifests = self._load()
+        reference = manifests.get(key, {}).get('files')
+        report = {'missing': [], 'truncated': [], 'changed': [], 'added': [],
+                  'problems': self.sanity_problems(root), 'files': len(current),
+                  'hashed': 0, 'skipped': 0, 'baseline': reference is None}
+        entries = {}
+        to_hash = []
+        for path, (size, mtime) in current.items():
+            known = reference.get(path) if reference else None
+            if known is None:
+                if reference is not None:
+                    report['added'].append(path)
+                to_hash.append(path)
+            elif size < known[0]:
+                report['truncated'].append(path)
+            elif (size, mtime) == tuple(known[:2]):
+                entries[path] = known
+            else:
+                to_hash.append(path)
+        if reference:
+            report['missing'] = sorted(path for path in reference if path not in current)
+        report['skipped'] = len(entries)
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="integridad") as pool:
+            digests = pool.map(lambda path: self.hash_file(os.path.join(root, path)), to_hash)
+            for path, digest in zip(to_hash, digests):
+                size, mtime = current[path]
+                known = reference.get(path) if reference else None
+                if known is not None and digest != known[2]:
+                    report['changed'].append(path)
+                entries[path] = [size, mtime, digest]
+        report['hashed'] = len(to_hash)
+
+        if not (report['missing'] or report['truncated'] or report['changed'] or report['problems']):
+            with self._lock:
+                manifests = self._load()
+                for other in [other for other in manifests if other.startswith(f"{ext_id.lower()}@")]:
+                    del manifests[other]
+                manifests[key] = {'path': root, 'files': entries}
+                self._save(manifests)
+        return report
+
+
+extension_integrity = ExtensionIntegrity()
+
+
+def vscode_config_dir():
+    """
+    Devuelve el directorio de configuración de VS Code para la plataforma actual.
+    """
+    if sys.platform == 'win32':
+        base = os.environ.get('APPDATA', os.path.expanduser('~'))
+    elif sys.platform == 'darwin':
+        base = os.path.join(os.path.expanduser('~'), 'Library', 'Application Support')
+    else:
+        base = os.environ.get('XDG_CONFIG_HOME', os.path.join(os.path.expanduser('~'), '.config'))
+    return os.path.join(base, 'Code')
+
+
+def vscode_logs_dir():
+    """
+    Devuelve el directorio de logs de VS Code para la plataforma actual.
+    """
+    return os.path.join(vscode_config_dir(), 'logs')
+
+
+def vscode_settings_path():
+    """
+    Devuelve la ruta del settings.json de usuario de VS Code.
+    """
+    return os.path.join(vscode_config_dir(), 'User', 'settings.json')
+
+
+class ExtensionHostLogAnalyzer:
+    """
+    Busca errores de CodeGPT en los logs del host de extensiones de VS Code.
+
+    Cada archivo se recorre con mmap y un único patrón precompilado. El
+    offset analizado de cada archivo se guarda en disco, de modo que las
+    ejecuciones siguientes solo leen lo que se añadió desde la anterior.
+    """
+
+    # Menciones de CodeGPT en logs compartidos con otras extensiones
+    CODEGPT_MENTION = re.compile(rb'(?i)codegpt')
+    SIGNATURES = re.compile(b'|'.join(b'(?P<%s>%s)' % (key.encode(), pattern)
+                                      for key, (_, pattern) in LOG_SIGNATURES.items()))
+
+    def __init__(self, logs_dir=None, state_path=None, max_age_days=LOG_MAX_AGE_DAYS):
+        self.logs_dir = logs_dir or vscode_logs_dir()
+        self.state_path = state_path or os.path.join(STATE_DIR, 'log_offsets.json')
+        self.max_age_days = max_age_days
+        self._offsets = None
+        self._lock = threading.Lock()
+
+    def _load_offsets(self):
+        """
+        Carga los offsets guardados por la ejecución anterior.
+        """
+        if self._offsets is None:
+            try:
+                with open(self.state_path, encoding='utf-8') as file:
+                    self._offsets = json.load(file)
+            except (OSError, ValueError):
+                self._offsets = {}
+        return self._offsets
+
+    def _save_offsets(self):
+        """
+        Guarda los offsets de forma atómica.
+        """
+        try:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            tmp_path = self.state_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(self._offsets, file)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            logger.warning(f"No se pudieron guardar los offsets de logs: {str(e)}")
+
+    def log_files(self):
+        """
+        Enumera los logs del host de extensiones de las sesiones recientes.
+        """
+        cutoff = time.time() - self.max_age_days * 86400
+        try:
+            sessions = [entry for entry in os.scandir(self.logs_dir)
+                        if entry.is_dir() and entry.stat().st_mtime >= cutoff]
+        except OSError:
+            return []
+        files = []
+        for session in sessions:
+            for root, dirs, names in os.walk(session.path):
+                in_exthost = 'exthost' in os.path.relpath(root, session.path).lower()
+                for name in names:
+                    if name.endswith('.log') and (in_exthost or 'exthost' in name.lower()):
+                        files.append(os.path.join(root, name))
+        return files
+
+    def scan_file(self, path, offset, counts, examples):
+        """
+        Analiza un archivo desde `offset` y devuelve (nuevo_offset, bytes_leídos).
+
+        Solo se analizan líneas completas; una línea a medio escribir se
+        vuelve a leer en la próxima ejecución.
+        """
+        with open(path, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < offset:
+                offset = 0  # El archivo se truncó o se reemplazó
+            if size == offset:
+                return offset, 0
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                end = data.rfind(b'\n', offset, size) + 1
+                if end <= offset:
+                    return offset, 0
+                whole_file = 'codegpt' in path.lower()
+                lines = [(offset, end)] if whole_file else self._codegpt_lines(data, offset, end)
+                for start, stop in lines:
+                    for match in self.SIGNATURES.finditer(data, start, stop):
+                        key = match.lastgroup
+                        counts[key] = counts.get(key, 0) + 1
+                        if key not in examples:
+                            line_start = data.rfind(b'\n', 0, match.start()) + 1
+                            line_end = data.find(b'\n', match.end(), end)
+                            examples[key] = data[line_start:line_end].decode('utf-8', 'replace').strip()[:200]
+        return end, end - offset
+
+    def _codegpt_lines(self, data, start, end):
+        """
+        Genera los rangos (inicio, fin) de las líneas que mencionan CodeGPT.
+        """
+        pos = start
+        while True:
+            match = self.CODEGPT_MENTION.search(data, pos, end)
+            if match is None:
+                return
+            line_start = data.rfind(b'\n', start, match.start()) + 1
+            line_end = data.find(b'\n', match.end(), end)
+            yield line_start, line_end
+            pos = line_end + 1
+
+    def analyze(self):
+        """
+        Analiza los datos nuevos de todos los logs.
+
+        Devuelve (conteos_por_firma, ejemplo_por_firma, archivos, bytes_leídos).
+        """
+        with self._lock:
+            offsets = self._load_offsets()
+            counts = {}
+            examples = {}
+            files = self.log_files()
+            scanned = 0
+            for path in files:
+                try:
+                    offsets[path], read = self.scan_file(path, offsets.get(path, 0), counts, examples)
+                    scanned += read
+                except (OSError, ValueError) as e:
+                    logger.debug(f"No se pudo analizar {path}: {str(e)}")
+            # Olvidar archivos que ya no existen o pertenecen a sesiones antiguas
+            current = set(files)
+            for path in [path for path in offsets if path not in current]:
+                del offsets[path]
+            self._save_offsets()
+            return counts, examples, len(files), scanned
+
+
+log_analyzer = ExtensionHostLogAnalyzer()
+
+
+def _proc_listening_inodes(ports):
+    """
+    Lee /proc/net/tcp y tcp6 y devuelve {inodo: puerto} de los sockets en
+    escucha sobre los puertos indicados.
+    """
+    wanted = {f"{port:04X}": port for port in ports}
+    inodes = {}
+    for path in ('/proc/net/tcp', '/proc/net/tcp6'):
+        try:
+            with open(path, encoding='ascii') as file:
+                lines = file.read().splitlines()[1:]
+        except OSError:
+            continue
+        for line in lines:
+            fields = line.split()
+            # fields: sl local_address rem_address st ... uid timeout inode
+            if fields[3] != '0A':  # TCP_LISTEN
+                continue
+            port = wanted.get(fields[1].rpartition(':')[2])
+            if port is not None:
+                inodes[fields[9]] = port
+    return inodes
+
+
+def _proc_socket_owners(inodes):
+    """
+    Recorre /proc/<pid>/fd y devuelve {inodo: (pid, nombre)} para los inodos dados.
+    """
+    targets = {f"socket:[{inode}]": inode for inode in inodes}
+    owners = {}
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        fd_dir = f"/proc/{pid}/fd"
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue  # Proceso terminado o sin permisos
+        for fd in fds:
+            try:
+                inode = targets.get(os.readlink(f"{fd_dir}/{fd}"))
+            except OSError:
+                continue
+            if inode is not None and inode not in owners:
+                try:
+                    with open(f"/proc/{pid}/comm", encoding='utf-8') as file:
+                        name = file.read().strip()
+                except OSError:
+                    name = '?'
+                owners[inode] = (int(pid), name)
+                if len(owners) == len(targets):
+                    return owners
+    return owners
+
+
+def _command_port_owners(ports):
+    """
+    Obtiene los procesos en escucha con `ss` o `netstat` cuando no hay /proc.
+    """
+    owners = {}
+    if sys.platform == 'win32':
+        command = ['netstat', '-ano', '-p', 'TCP']
+    elif sys.platform == 'darwin':
+        command = ['lsof', '-nP', '-iTCP', '-sTCP:LISTEN']
+    else:
+        command = ['ss', '-ltnpH']
+    try:
+        output = command_runner.run(command, timeout=PORT_SCAN_TIMEOUT).output
+    except CommandError as e:
+        logger.warning(f"No se pudieron listar los puertos con {command[0]}: {str(e)}")
+        return owners
+    for line in output.splitlines():
+        fields = line.split()
+        if sys.platform == 'win32':
+            # Proto  Dirección local  Dirección remota  Estado  PID
+            if len(fields) < 5 or fields[3].upper() not in ('LISTENING', 'ESCUCHANDO'):
+                continue
+            address, pid, name = fields[1], fields[4], '?'
+        elif sys.platform == 'darwin':
+            # COMMAND PID USER FD TYPE DEVICE SIZE/OFF NODE NAME (LISTEN)
+            if len(fields) < 9 or not fields[1].isdigit():
+                continue
+            address, pid, name = fields[8], fields[1], fields[0]
+        else:
+            # State Recv-Q Send-Q Local Peer Process
+            if len(fields) < 4:
+                continue
+            address = fields[3]
+            match = re.search(r'\("([^"]+)",pid=(\d+)', line)
+            name, pid = match.groups() if match else ('?', '0')
+        port = address.rpartition(':')[2]
+        if port.isdigit() and int(port) in ports:
+            owners.setdefault(int(port), set()).add((int(pid), name))
+    return owners
+
+
+def scan_port_owners(ports):
+    """
+    Devuelve {puerto: [(pid, nombre), ...]} de los procesos en escucha en `ports`.
+
+    En Linux se leen /proc/net/tcp{,6} y /proc/<pid>/fd directamente; en
+    otras plataformas se recurre a `ss`, `netstat` o `lsof`.
+    """
+    ports = set(ports)
+    if not os.path.exists('/proc/net/tcp'):
+        return {port: sorted(owners) for port, owners in _command_port_owners(ports).items()}
+    inodes = _proc_listening_inodes(ports)
+    owners = _proc_socket_owners(inodes) if inodes else {}
+    result = {}
+    for inode, port in inodes.items():
+        # Un socket sin dueño visible pertenece a otro usuario o a un contenedor
+        owner = owners.get(inode, (0, '?'))
+        if owner not in result.setdefault(port, []):
+            result[port].append(owner)
+    return result
+
+
+def _local_addresses():
+    """
+    Direcciones locales del equipo, incluida la usada para salir a Internet.
+    """
+    addresses = set()
+    try:
+        for info in socket.getaddrinfo(socket.gethostname(), None):
+            addresses.add(info[4][0])
+    except OSError:
+        pass
+    # connect() en UDP no envía paquetes: solo elige la interfaz de salida
+    for family, target in ((socket.AF_INET, ('192.0.2.1', 53)), (socket.AF_INET6, ('2001:db8::1', 53))):
+        try:
+            with socket.socket(family, socket.SOCK_DGRAM) as sock:
+                sock.connect(target)
+                addresses.add(sock.getsockname()[0])
+        except OSError:
+            pass
+    return sorted(addresses)
+
+
+def _system_resolvers():
+    """
+    Contenido de la configuración del resolvedor del sistema, si existe.
+    """
+    try:
+        with open('/etc/resolv.conf', encoding='utf-8', errors='replace') as file:
+            return [line.strip() for line in file if line.strip() and not line.startswith('#')]
+    except OSError:
+        return []
+
+
+def environment_fingerprint():
+    """
+    Calcula una huella por componente del entorno que afecta al diagnóstico.
+
+    Devuelve {componente: hash} para 'interfaces', 'resolvers', 'proxy' y
+    'extensions'.
+    """
+    try:
+        interfaces = sorted(name for _, name in socket.if_nameindex())
+    except (OSError, AttributeError):
+        interfaces = []
+    components = {
+        'interfaces': [interfaces, _local_addresses()],
+        'resolvers': [DNS_RESOLVERS, _system_resolvers()],
+        'proxy': [sorted(getproxies().items()), discover_proxy()],
+        'extensions': sorted((ext_id, version) for ext_id, version, _ in
+                             extension_inventory.extensions().values()),
+    }
+    return {name: hashlib.sha1(json.dumps(value, sort_keys=True).encode('utf-8')).hexdigest()
+            for name, value in components.items()}
+
+
+class CheckCache:
+    """
+    Resultados sanos de cada etapa del diagnóstico, reutilizables mientras no
+    cambie la huella de sus entradas ni expire su TTL.
+
+    Se guarda en disco para que una nueva ejecución del programa también los
+    aproveche. Las etapas con problemas nunca se guardan: siempre se repiten.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(STATE_DIR, 'check_cache.json')
+        self._entries = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path, encoding='utf-8') as file:
+                    self._entries = json.load(file)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def get(self, stage, fingerprint):
+        """
+        Devuelve los resultados guardados de `stage` o None si no son válidos.
+        """
+        with self._lock:
+            entry = self._load().get(stage)
+            if not entry or entry['fingerprint'] != fingerprint or time.time() >= entry['expires']:
+                return None
+            results = [CheckResult.from_dict(data) for data in entry['results']]
+        for result in results:
+            result.cached = True
+        return results
+
+    def put(self, stage, fingerprint, results, ttl):
+        """
+        Guarda los resultados de `stage` si ninguno aporta problemas.
+        """
+        if any(result.issues for result in results):
+            with self._lock:
+                self._load().pop(stage, None)
+            return
+        with self._lock:
+            self._load()[stage] = {'fingerprint': fingerprint, 'expires': time.time() + ttl,
+                                   'results': [result.to_dict(include_message=True) for result in results]}
+
+    def save(self):
+        """
+        Guarda la caché en disco de forma atómica.
+        """
+        with self._lock:
+            if self._entries is None:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as file:
+                    json.dump(self._entries, file, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning(f"No se pudo guardar la caché de verificaciones: {str(e)}")
+
+
+check_cache = CheckCache()
+
+
+class NdjsonReportWriter:
+    """
+    Escribe los resultados como NDJSON (un objeto JSON por línea) a medida
+    que se producen, sin acumularlos en memoria. Cada objeto lleva el nombre
+    de la máquina para poder agregar informes de varias (ver `FleetAggregator`).
+    """
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self.machine = socket.gethostname()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def write(self, result, **extra):
+        """
+        Añade un resultado al informe; `extra` se incluye en el objeto.
+        """
+        record = result.to_dict()
+        record['machine'] = self.machine
+        record.update(extra)
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Verificaciones en paralelo: hilos simultáneos y plazo por defecto (segundos)
+MAX_CHECK_WORKERS = MAX_PROBE_WORKERS
+CHECK_TIMEOUT = 30
+# Plazo global de una pasada completa (segundos): lo que siga pendiente se da por expirado
+RUN_DEADLINE = 60
+
+CheckSpec = namedtuple('CheckSpec', ['name', 'description', 'func', 'depends', 'after', 'timeout', 'cost',
+                                     'targets', 'enabled'])
+CheckNode = namedtuple('CheckNode', ['key', 'spec', 'target', 'description', 'depends', 'after'])
+
+
+class CheckRegistry:
+    """
+    Catálogo de las verificaciones del diagnóstico.
+
+    Cada verificación declara sus prerrequisitos (`depends`: se omite si
+    alguno falla), las verificaciones que deben terminar antes aunque fallen
+    (`after`), su plazo y su coste relativo. Con `targets`, la verificación se
+    repite para cada objetivo y las dependencias entre verificaciones con
+    objetivos se resuelven objetivo a objetivo (el HTTP de un dominio espera
+    al DNS del mismo dominio). `enabled` permite activarla solo bajo demanda.
+    """
+
+    def __init__(self):
+        self._specs = {}
+
+    def register(self, name, description, depends=(), after=(), timeout=CHECK_TIMEOUT, cost=1,
+                 targets=None, enabled=None):
+        """
+        Decorador que registra `func(runner[, objetivo])`, que devuelve un
+        `CheckResult` o una lista de ellos. En `description`, "{target}" se
+        sustituye por el objetivo.
+        """
+        def decorator(func):
+            self._specs[name] = CheckSpec(name, description, func, tuple(depends), tuple(after),
+                                          timeout, cost, targets, enabled)
+            return func
+        return decorator
+
+    def nodes(self):
+        """
+        Expande las verificaciones activas en nodos del grafo de ejecución.
+        """
+        specs = [spec for spec in self._specs.values() if spec.enabled is None or spec.enabled()]
+        active = {spec.name: spec for spec in specs}
+        targets = {spec.name: list(spec.targets()) if spec.targets else [None] for spec in specs}
+
+        def key(name, target):
+            return name if target is None else f"{name} {target}"
+
+        def resolve(spec, target, names):
+            keys = []
+            for name in names:
+                if name not in self._specs:
+                    raise ValueError(f"La verificación {spec.name} depende de {name}, que no está registrada")
+                if name not in active:
+                    continue
+                if target is not None and active[name].targets and target in targets[name]:
+                    keys.append(key(name, target))
+                else:
+                    keys.extend(key(name, other) for other in targets[name])
+            return tuple(keys)
+
+        return [CheckNode(key(spec.name, target), spec, target,
+                          spec.description.format(target=target) if target is not None else spec.description,
+                          resolve(spec, target, spec.depends), resolve(spec, target, spec.after))
+                for spec in specs for target in targets[spec.name]]
+
+
+check_registry = CheckRegistry()
+
+
+class CheckScheduler:
+    """
+    Ejecuta el grafo de verificaciones en paralelo respetando sus dependencias.
+
+    Cada verificación empieza en cuanto terminan sus prerrequisitos, las más
+    costosas primero. Si un prerrequisito falla, sus dependientes se omiten
+    sin ejecutarse; si una verificación supera su plazo se informa como
+    expirada y el resto continúa sin esperarla. Además, toda la pasada tiene
+    un plazo global (`deadline`): al agotarse, lo que siga pendiente, en
+    ejecución o sin empezar, se da por expirado.
+
+    Un hilo no se puede detener desde fuera, así que una verificación expirada
+    sigue ocupando uno de los `max_workers` hilos hasta que termina de verdad.
+    Los hilos que siguen vivos de una pasada anterior no se descuentan en la
+    siguiente; solo se registran en el log.
+    """
+    FAILED = ('fail', 'error', 'timeout', 'skipped')
+
+    def __init__(self, max_workers=MAX_CHECK_WORKERS, deadline=RUN_DEADLINE):
+        self.max_workers = max_workers
+        self.deadline = deadline
+
+    def run(self, nodes, execute, on_complete, on_progress=None):
+        """
+        Ejecuta `execute(nodo)` para cada nodo y devuelve {clave: resultados}.
 
-    def __init__(self, parent=None):
-        super().__init__()
-        self.parent = parent
+        `on_complete(nodo, resultados)` se llama desde el hilo que invoca
+        `run`, una vez por nodo (también para los omitidos y expirados), y
+        `on_progress(coste_completado, coste_total)` tras cada uno.
+        """
+        by_key = {node.key: node for node in nodes}
+        order = {node.key: i for i, node in enumerate(nodes)}
+        waiting = {node.key: set(node.depends + node.after) for node in nodes}
+        dependents = {node.key: [] for node in nodes}
+        for node in nodes:
+            for other in waiting[node.key]:
+                dependents[other].append(node.key)
+        total = sum(node.spec.cost for node in nodes)
+        finished = {}
+        ready = [node.key for node in nodes if not waiting[node.key]]
+        # running: plazo de cada verificación en curso; busy: hilos vivos, incluidos los expirados
+        running = {}
+        busy = set()
+        completed = queue.Queue()
+        done = 0
+        run_deadline = time.monotonic() + self.deadline
+        stale = sum(thread.name.startswith("verificación-") for thread in threading.enumerate())
+        if stale:
+            logger.warning(f"{stale} verificaciones expiradas de pasadas anteriores siguen en ejecución")
 
-    def run(self):
-        issues = []
-        try:
-            # Verificar la extensión CodeGPT
-            ext_id = self.find_codegpt_extension_id()
-            if ext_id:
-                logger.info(f"Extensión CodeGPT encontrada: {ext_id}")
-                result, ext_issues = self.parent.check_vscode_extensions(ext_id)
+        def work(node):
+            try:
+                results = execute(node)
+            except Exception as e:
+                results = e
+            completed.put((node.key, results))
+
+        def complete(key, results):
+            nonlocal done
+            node = by_key[key]
+            finished[key] = results
+            done += node.spec.cost
+            on_complete(node, results)
+            if on_progress:
+                on_progress(done, total)
+            failed = any(result.status in self.FAILED for result in results)
+            for other in dependents[key]:
+                if other in finished:
+                    continue
+                waiting[other].discard(key)
+                if failed and key in by_key[other].depends:
+                    complete(other, [self.skipped(by_key[other], key)])
+                elif not waiting[other]:
+                    ready.append(other)
+
+        while len(finished) < len(nodes):
+            ready.sort(key=lambda key: (-by_key[key].spec.cost, order[key]))
+            while ready and len(busy) < self.max_workers:
+                node = by_key[ready.pop(0)]
+                running[node.key] = min(time.monotonic() + node.spec.timeout, run_deadline)
+                busy.add(node.key)
+                threading.Thread(target=work, args=(node,), name=f"verificación-{node.key}",
+                                 daemon=True).start()
+            if not running and not ready:
+                # Solo quedan nodos con dependencias circulares
+                for key in sorted(set(by_key) - set(finished), key=order.get):
+                    if key not in finished:
+                        complete(key, [self.error_result(by_key[key], "dependencia circular", 'DependencyCycle')])
+                break
+            # Sin nada en curso, solo se espera a que un hilo expirado libere su hueco
+            wait_until = min(running.values()) if running else run_deadline
+            try:
+                key, results = completed.get(timeout=max(0.0, wait_until - time.monotonic()))
+            except queue.Empty:
+                pass
             else:
-                logger.warning("Extensión CodeGPT no encontrada")
-                result = "❌ No se pudo encontrar la extensión CodeGPT\n"
-                ext_issues = ["Extensión CodeGPT no instalada"]
-            self.progress.emit(result)
-            issues.extend(ext_issues)
-        except Exception as e:
-            logger.error(f"Error al verificar extensiones: {str(e)}", exc_info=True)
-            self.error.emit(f"Error al verificar extensiones: {str(e)}")
-            issues.append(f"Error al verificar extensiones: {str(e)}")
+                busy.discard(key)
+                # Los resultados tardíos de verificaciones ya expiradas se descartan
+                if running.pop(key, None) is not None:
+                    complete(key, self.normalize(by_key[key], results))
+            now = time.monotonic()
+            for key, deadline in list(running.items()):
+                if deadline <= now:
+                    del running[key]
+                    node = by_key[key]
+                    if deadline >= run_deadline:
+                        logger.warning(f"La verificación {key} no terminó antes del plazo global de "
+                                       f"{self.deadline} s")
+                        complete(key, [self.timed_out(node, f"el plazo global de {self.deadline} s")])
+                    else:
+                        logger.warning(f"La verificación {key} superó su plazo de {node.spec.timeout} s")
+                        complete(key, [self.timed_out(node, f"{node.spec.timeout} s")])
+            if now >= run_deadline:
+                # Plazo global agotado: las verificaciones que no llegaron a empezar también expiran
+                for key in sorted(set(by_key) - set(finished), key=order.get):
+                    if key not in finished:
+                        complete(key, [self.timed_out(by_key[key], f"el plazo global de {self.deadline} s")])
+                break
+        return finished
+
+    def normalize(self, node, results):
+        """
+        Convierte lo devuelto por una verificación en una lista de `CheckResult`.
+        """
+        if isinstance(results, Exception):
+            return [self.error_result(node, str(results), type(results).__name__)]
+        if results is None:
+            return []
+        return [results] if isinstance(results, CheckResult) else list(results)
 
-        # Verificar conectividad de red
+    @staticmethod
+    def error_result(node, message, error):
+        return CheckResult(node.spec.name, node.target or node.spec.name, 'error',
+                           f"❌ Error al {node.description}: {message}",
+                           [f"Error al {node.description}: {message}"], error=error)
+
+    @staticmethod
+    def timed_out(node, limit):
+        return CheckResult(node.spec.name, node.target or node.spec.name, 'timeout',
+                           f"⏱️ Sin respuesta al {node.description} tras {limit}",
+                           [f"Tiempo de espera agotado en {node.key}"], error='TimeoutError')
+
+    @staticmethod
+    def skipped(node, prerequisite):
+        return CheckResult(node.spec.name, node.target or node.spec.name, 'skipped',
+                           f"⏭️ Se omite {node.description}: falló {prerequisite}", error='DependencyFailed')
+
+
+class DiagnosticRunner:
+    """
+    Ejecuta las verificaciones del diagnóstico sin depender de Qt.
+
+    `progress` recibe cada mensaje de resultado, `error` cada mensaje de
+    error y `on_result` cada `CheckResult`; `WorkerThread` los conecta a sus
+    señales y el modo headless a la salida estándar y al informe NDJSON.
+
+    Las verificaciones se declaran con `check_registry` y las ejecuta
+    `CheckScheduler` en paralelo; `on_progress(hecho, total)` recibe el
+    avance ponderado por el coste de cada verificación.
+
+    Con `use_cache`, las verificaciones cuyas entradas no cambiaron desde la
+    última ejecución sana reutilizan sus resultados (ver `CheckCache`).
+    """
+
+    def __init__(self, progress=None, error=None, on_result=None, use_cache=True, on_progress=None):
+        self.progress = progress or (lambda text: None)
+        self.error = error or (lambda text: None)
+        self.on_result = on_result or (lambda result: None)
+        self.on_progress = on_progress
+        self.use_cache = use_cache
+        self.results = []
+        self.proxy = discover_proxy()
+
+    def proxy_for(self, host):
+        """
+        Devuelve el proxy por el que la extensión conectaría con `host`, o None.
+        """
+        return self.proxy if proxy_applies(self.proxy, host) else None
+
+    def emit(self, result):
+        """
+        Publica un resultado por `progress` y `on_result`.
+        """
+        if result.message:
+            message = result.message
+            if result.cached:
+                age = time.time() - result.timestamp
+                message = f"♻️ [en caché, hace {age:.0f} s] {message}"
+            self.progress(message)
+        self.on_result(result)
+
+    def run_check(self, node, fingerprint):
+        """
+        Ejecuta un nodo del grafo o reutiliza sus resultados si siguen siendo válidos.
+        """
+        name = node.spec.name
+        if fingerprint is not None and name in CHECK_INPUTS:
+            check_fingerprint = [fingerprint[component] for component in CHECK_INPUTS[name]]
+            cached = check_cache.get(node.key, check_fingerprint)
+            if cached is not None:
+                return cached
         try:
-            result, net_issues = self.check_network_connectivity()
-            self.progress.emit(result)
-            issues.extend(net_issues)
+            results = node.spec.func(self, *([node.target] if node.target is not None else []))
         except Exception as e:
-            logger.error(f"Error al verificar la red: {str(e)}", exc_info=True)
-            self.error.emit(f"Error al verificar la red: {str(e)}")
-            issues.append(f"Error al verificar la red: {str(e)}")
+            logger.error(f"Error al {node.description}: {str(e)}", exc_info=True)
+            self.error(f"Error al {node.description}: {str(e)}")
+            return [CheckScheduler.error_result(node, str(e), type(e).__name__)]
+        results = CheckScheduler().normalize(node, results)
+        if fingerprint is not None and name in CHECK_INPUTS:
+            check_cache.put(node.key, check_fingerprint, results, CHECK_TTLS[name])
+        return results
+
+    def run(self):
+        """
+        Ejecuta todas las verificaciones y devuelve la lista de problemas, sin
+        repetidos (varias verificaciones pueden aportar el mismo problema).
+
+        Los `CheckResult` de la ejecución quedan en `self.results`.
+        """
+        issues = []
+        self.results = []
+        fingerprint = None
+        if self.use_cache:
+            try:
+                fingerprint = environment_fingerprint()
+            except Exception as e:
+                logger.error(f"Error al calcular la huella del entorno: {str(e)}", exc_info=True)
+
+        def on_complete(node, results):
+            for result in results:
+                self.emit(result)
+                self.results.append(result)
+                issues.extend(result.issues)
 
-        self.finished.emit(issues)
+        if self.proxy:
+            strict = "" if self.proxy.strict_ssl else ", sin verificar certificados"
+            self.progress(f"🔧 Proxy detectado: {self.proxy.url} ({self.proxy.source}{strict})")
+        start = time.monotonic()
+        nodes = check_registry.nodes()
+        CheckScheduler().run(nodes, lambda node: self.run_check(node, fingerprint), on_complete,
+                             self.on_progress)
+        skipped = sum(result.status == 'skipped' for result in self.results)
+        self.progress(f"Diagnóstico completado en {time.monotonic() - start:.2f} s "
+                      f"({len(nodes)} verificaciones, {skipped} omitidas)\n")
+        if fingerprint is not None:
+            check_cache.save()
+        return list(dict.fromkeys(issues))
 
     def find_codegpt_extension_id(self):
         """
         Busca el ID de la extensión CodeGPT en las extensiones instaladas.
         """
         try:
-            result = subprocess.run(['code', '--list-extensions', '--show-versions'],
-                                    capture_output=True, text=True, shell=True)
-            extensions = result.stdout.splitlines()
-            for ext in extensions:
-                if 'codegpt' in ext.lower():
-                    return ext.split('@')[0]  # Retorna el ID sin la versión
-            return None
+            matches = extension_inventory.find('codegpt')
+            return matches[0][0] if matches else None
         except Exception as e:
             logger.error(f"Error al buscar el ID de la extensión CodeGPT: {str(e)}", exc_info=True)
             return None
 
-    def check_network_connectivity(self):
+    @check_registry.register('extension', "verificar extensiones", timeout=CODE_CLI_TIMEOUT + 5)
+    def check_extension(self):
+        """
+        Verifica la extensión CodeGPT.
+        """
+        ext_id = self.find_codegpt_extension_id()
+        if ext_id:
+            logger.info(f"Extensión CodeGPT encontrada: {ext_id}")
+            result = self.check_vscode_extensions(ext_id)
+        else:
+            logger.warning("Extensión CodeGPT no encontrada")
+            result = CheckResult('extension', 'codegpt', 'fail',
+                                 "❌ No se pudo encontrar la extensión CodeGPT\n",
+                                 ["Extensión CodeGPT no instalada"], error='NotInstalled')
+        return [result]
+
+    def check_vscode_extensions(self, ext_id):
+        """
+        Verifica si la extensión CodeGPT está instalada.
+        """
+        codegpt_extensions = [f"{ext}@{version}" if version else ext
+                              for ext, version, _ in extension_inventory.find(ext_id)]
+        if codegpt_extensions:
+            res = "✅ Extensiones de CodeGPT Instaladas:\n"
+            for ext in codegpt_extensions:
+                res += f"   - {ext}\n"
+            return CheckResult('extension', ext_id, 'ok', res)
+        else:
+            res = "❌ No se encontraron extensiones de CodeGPT\n"
+            return CheckResult('extension', ext_id, 'fail', res, ["Extensión de CodeGPT no instalada"],
+                               error='NotInstalled')
+
+    @check_registry.register('integrity', "verificar la integridad de la extensión", depends=('extension',),
+                             timeout=60, cost=3)
+    def check_extension_integrity(self):
+        """
+        Verifica que los archivos de la extensión CodeGPT no estén dañados.
+        """
+        ext_id = self.find_codegpt_extension_id()
+        if not ext_id:
+            return []
+        results = []
+        for ext, version, path in extension_inventory.find(ext_id):
+            if not path:
+                # El índice salió del CLI `code`: no se conoce el directorio
+                continue
+            start = time.monotonic()
+            report = extension_integrity.verify(ext, version, path)
+            elapsed = time.monotonic() - start
+            results.append(self.integrity_result(ext, version, report, elapsed))
+        return results
+
+    @staticmethod
+    def integrity_result(ext, version, report, elapsed):
+        """
+        Convierte el informe de `ExtensionIntegrity.verify` en un `CheckResult`.
+        """
+        name = f"{ext}@{version}"
+        timings = {'scan': round(elapsed, 4)}
+        damaged = [(label, report[key]) for key, label in (('missing', "faltantes"), ('truncated', "truncados"),
+                                                           ('changed', "modificados")) if report[key]]
+        if report['problems'] or damaged:
+            res = f"❌ La extensión {name} está dañada; reinstálela:\n"
+            for problem in report['problems']:
+                res += f"   - {problem}\n"
+            for label, paths in damaged:
+                shown = ", ".join(paths[:5]) + (f" y {len(paths) - 5} más" if len(paths) > 5 else "")
+                res += f"   - {len(paths)} archivos {label}: {shown}\n"
+            summary = ", ".join(f"{len(paths)} {label}" for label, paths in damaged) or report['problems'][0]
+            return CheckResult('integrity', ext, 'fail', res, [f"Extensión {name} dañada: {summary}"],
+                               timings, 'Corrupted' if damaged else 'InvalidManifest')
+        if report['baseline']:
+            return CheckResult('integrity', ext, 'ok',
+                               f"✅ Integridad de {name}: {report['files']} archivos registrados como referencia "
+                               f"({elapsed:.2f} s)\n", timings=timings)
+        added = f", {len(report['added'])} nuevos" if report['added'] else ""
+        return CheckResult('integrity', ext, 'ok',
+                           f"✅ Integridad de {name}: {report['files']} archivos verificados "
+                           f"({report['hashed']} recalculados, {report['skipped']} sin cambios{added}, "
+                           f"{elapsed:.2f} s)\n", timings=timings)
+
+    @check_registry.register('logs', "analizar los logs", timeout=60, cost=3)
+    def check_extension_host_logs(self):
+        """
+        Busca errores de CodeGPT registrados desde la ejecución anterior.
+        """
+        start = time.monotonic()
+        counts, examples, files, scanned = log_analyzer.analyze()
+        elapsed = time.monotonic() - start
+        summary = (f"{log_analyzer.logs_dir}: {files} archivos, "
+                   f"{scanned / (1024 * 1024):.1f} MB nuevos, {elapsed:.2f} s")
+        timings = {'scan': round(elapsed, 4)}
+        if not counts:
+            result = CheckResult('logs', LOGS_TARGET, 'ok',
+                                 f"✅ Sin errores nuevos de CodeGPT en los logs de VS Code ({summary})\n",
+                                 timings=timings)
+        else:
+            res = f"⚠️ Errores de CodeGPT en los logs de VS Code ({summary}):\n"
+            issues = []
+            ordered = sorted(counts.items(), key=lambda item: -item[1])
+            for key, count in ordered:
+                label = LOG_SIGNATURES[key][0]
+                res += f"   - {label} × {count}: {examples[key]}\n"
+                issues.append(f"Errores de CodeGPT en los logs: {label}")
+            result = CheckResult('logs', LOGS_TARGET, 'warning', res, issues,
+                                 timings=timings, error=ordered[0][0])
+        return [result]
+
+    @check_registry.register('ports', "verificar los puertos", timeout=PORT_SCAN_TIMEOUT + 5)
+    def check_port_conflicts(self):
         """
-        Verifica la conectividad de red con los dominios de CodeGPT.
+        Verifica qué procesos ocupan los puertos usados por CodeGPT.
         """
+        start = time.monotonic()
+        owners = scan_port_owners(CODEGPT_PORTS)
+        timings = {'scan': round(time.monotonic() - start, 4)}
         results = []
+        for port, expected in sorted(CODEGPT_PORTS.items()):
+            if port not in owners:
+                results.append(CheckResult('port', str(port), 'ok', f"✅ Puerto {port} libre",
+                                           timings=timings))
+                continue
+            for pid, name in owners[port]:
+                owner = f"{name} (PID {pid})" if pid else "un proceso de otro usuario o contenedor"
+                if any(candidate in name.lower() for candidate in expected):
+                    results.append(CheckResult('port', str(port), 'ok',
+                                               f"✅ Puerto {port} en uso por {owner}", timings=timings))
+                else:
+                    results.append(CheckResult('port', str(port), 'warning',
+                                               f"⚠️ Puerto {port} ocupado por {owner}",
+                                               [f"Conflicto en el puerto {port}: ocupado por {owner}"],
+                                               timings=timings, error='PortInUse'))
+        return results
+
+    @check_registry.register('dns', "resolver el DNS de {target}", timeout=PROBE_DEADLINE,
+                             targets=lambda: CODEGPT_DOMAINS)
+    def probe_dns(self, domain):
+        """
+        Verifica la resolución DNS de un dominio comparando el resolvedor del
+        sistema con los resolvedores directos configurados.
+        """
+        results = compare_dns_resolvers(domain)
+        details = format_dns_comparison(results)
+        timings = {resolver: None if result['cached'] else round(result['latency'], 4)
+                   for resolver, result in results.items() if not result['error']}
+
+        def resolved(result):
+            return bool(result['answers'].get('A') or result['answers'].get('AAAA'))
+
+        system_ok = resolved(results['sistema'])
+        direct = [result for resolver, result in results.items() if resolver != 'sistema']
+        direct_ok = sum(resolved(result) for result in direct)
+        if not system_ok and self.proxy_for(domain):
+            # Detrás de un proxy es el proxy quien resuelve los dominios externos
+            return CheckResult('dns', domain, 'warning',
+                               f"⚠️ El resolvedor del sistema no resuelve {domain}, pero las conexiones pasan "
+                               f"por el proxy {self.proxy.url}, que lo resuelve por su cuenta\n{details}",
+                               timings=timings, error='ResolvedByProxy')
+        if not system_ok:
+            issues = [f"Problema de DNS con {domain}"]
+            if direct_ok:
+                return CheckResult('dns', domain, 'fail',
+                                   f"❌ Resolución DNS fallida para {domain} con el resolvedor del sistema, "
+                                   f"pero {direct_ok} resolvedores directos responden: probable problema del "
+                                   f"DNS local o corporativo\n{details}", issues, timings, 'SystemResolverFailure')
+            return CheckResult('dns', domain, 'fail', f"❌ Resolución DNS fallida para {domain}\n{details}",
+                               issues, timings, 'ResolutionFailure')
+
+        system_a = set(results['sistema']['answers'].get('A') or [])
+        differing = [result for result in direct if resolved(result)
+                     and system_a and not system_a & set(result['answers'].get('A') or [])]
+        note = " (las direcciones difieren entre resolvedores)" if differing else ""
+        return CheckResult('dns', domain, 'ok', f"✅ Resolución DNS exitosa para {domain}{note}\n{details}",
+                           timings=timings)
+
+    @check_registry.register('http', "conectar por HTTPS con {target}", depends=('dns',),
+                             timeout=PROBE_DEADLINE, cost=HTTP_PROBE_SAMPLES, targets=lambda: CODEGPT_DOMAINS)
+    def probe_http(self, domain):
+        """
+        Verifica la conectividad HTTP con un dominio y mide la latencia de cada fase.
+
+        Las respuestas 2xx/3xx y 401/403/405 confirman que el servidor funciona;
+        un 5xx es un fallo y el resto de 4xx un aviso (ver
+        `classify_http_status`). El código se muestra junto a los tiempos. Si hay
+        un proxy para el dominio, el sondeo va por el proxy, como la extensión;
+        la comparación con la conexión directa la hace `compare_proxy`.
+        """
+        proxy = self.proxy_for(domain)
+        via = f" a través del proxy {proxy.url}" if proxy else ""
+        try:
+            status, stats, reused = sample_https_phases(domain, pool=probe_pool, proxy=proxy)
+        except ProbePhaseError as e:
+            return CheckResult('http', domain, 'fail', f"❌ Conexión HTTP fallida a {domain}{via} ({str(e)})",
+                               [f"Problema de conectividad HTTP con {domain}{via}"],
+                               error=f"{e.phase}:{type(e.error).__name__}")
+        # [p50, p95, máx] solo para las fases con varias muestras; el resto es un único valor
+        timings = {phase: [round(value, 4) for value in values[:3]] if values[3] > 1 else round(values[0], 4)
+                   for phase, values in stats.items()}
+        details = (f"(HTTP {status}, {HTTP_PROBE_SAMPLES} muestras, {reused} con conexión reutilizada)\n"
+                   f"{format_phase_stats(stats)}")
+        outcome = classify_http_status(status)
+        if outcome == 'ok':
+            message = f"✅ Conexión HTTP exitosa a {domain}{via} {details}"
+            issues = []
+        elif outcome == 'warning':
+            message = f"⚠️ {domain}{via} responde con un código inesperado {details}"
+            issues = [f"{domain} responde HTTP {status}"]
+        else:
+            message = f"❌ {domain}{via} responde con un error del servidor {details}"
+            issues = [f"Error del servidor en {domain}: HTTP {status}"]
+        return CheckResult('http', domain, outcome, message, issues, timings,
+                           None if outcome == 'ok' else f"HTTP{status}")
+
+    @check_registry.register('proxy', "comparar la conexión con {target} con y sin proxy", after=('http',),
+                             timeout=PROBE_DEADLINE,
+                             targets=lambda: [domain for domain in CODEGPT_DOMAINS
+                                              if proxy_applies(discover_proxy(), domain)])
+    def compare_proxy(self, domain):
+        """
+        Calcula la latencia que añade el proxy a una conexión nueva con `domain`.
+
+        Abre a la vez una conexión por el proxy y otra directa, cada una con
+        una sola muestra, sin pool y con PROXY_COMPARE_TIMEOUT por fase, y
+        resta el tiempo total de la directa (DNS, TCP, TLS y TTFB) al de la
+        del proxy. Es solo informativa: nunca aporta problemas al informe,
+        porque la conectividad por el proxy ya la evalúa el sondeo HTTP.
+        """
+        proxy = self.proxy_for(domain)
+        if proxy is None:
+            return CheckResult('proxy', domain, 'ok', f"✅ Las conexiones con {domain} no pasan por el proxy")
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="proxy") as executor:
+            proxied = executor.submit(sample_https_phases, domain, samples=1, proxy=proxy,
+                                      timeout=PROXY_COMPARE_TIMEOUT)
+            direct = executor.submit(sample_https_phases, domain, samples=1, timeout=PROXY_COMPARE_TIMEOUT)
+        try:
+            _, proxied_stats, _ = proxied.result()
+        except ProbePhaseError as e:
+            return CheckResult('proxy', domain, 'warning',
+                               f"⚠️ No se pudo medir la latencia del proxy hacia {domain} ({str(e)})",
+                               error=f"{e.phase}:{type(e.error).__name__}")
+        proxied_total = sum(values[0] for values in proxied_stats.values())
+        timings = {'proxied': round(proxied_total, 4)}
+        try:
+            _, direct_stats, _ = direct.result()
+        except ProbePhaseError as e:
+            return CheckResult('proxy', domain, 'ok',
+                               f"✅ Por el proxy {proxy.url}: {proxied_total * 1000:.1f} ms; sin proxy la "
+                               f"conexión con {domain} falla ({str(e)}): solo se llega por el proxy",
+                               timings=timings)
+        direct_total = sum(values[0] for values in direct_stats.values())
+        added = proxied_total - direct_total
+        timings.update(direct=round(direct_total, 4), proxy_added=round(added, 4))
+        return CheckResult('proxy', domain, 'ok',
+                           f"✅ Conexión nueva con {domain}: {direct_total * 1000:.1f} ms sin proxy, "
+                           f"{proxied_total * 1000:.1f} ms por el proxy {proxy.url} "
+                           f"(el proxy añade {added * 1000:+.1f} ms)", timings=timings)
+
+    @check_registry.register('reference', "conectar con {target}", timeout=PROBE_DEADLINE,
+                             targets=lambda: REFERENCE_DOMAINS)
+    def probe_reference(self, domain):
+        """
+        Verifica la conectividad con un dominio de referencia.
+        """
+        try:
+            status, stats, reused = sample_https_phases(domain, samples=1, pool=probe_pool,
+                                                        proxy=self.proxy_for(domain))
+        except ProbePhaseError as e:
+            return CheckResult('reference', domain, 'fail',
+                               f"❌ Conexión a {domain} fallida: posible problema general de red",
+                               ["Problemas generales de conectividad de red detectados"],
+                               error=f"{e.phase}:{type(e.error).__name__}")
+        connection = "conexión reutilizada" if reused else "conexión nueva"
+        timings = {phase: round(values[0], 4) for phase, values in stats.items()}
+        outcome = classify_http_status(status)
+        if outcome == 'fail':
+            return CheckResult('reference', domain, 'fail',
+                               f"❌ {domain} responde con un error del servidor (HTTP {status}, prueba de "
+                               f"referencia, {connection})",
+                               [f"Error del servidor en {domain}: HTTP {status}"], timings, f"HTTP{status}")
+        if outcome == 'warning':
+            return CheckResult('reference', domain, 'warning',
+                               f"⚠️ {domain} responde con un código inesperado (HTTP {status}, prueba de "
+                               f"referencia, {connection})",
+                               [f"{domain} responde HTTP {status}"], timings, f"HTTP{status}")
+        return CheckResult('reference', domain, 'ok',
+                           f"✅ Conexión a {domain} exitosa (HTTP {status}, prueba de referencia, {connection})",
+                           timings=timings)
+
+    @check_registry.register('throughput', "medir la velocidad de descarga", after=('http', 'reference'),
+                             timeout=THROUGHPUT_MAX_SECONDS + 3 * PROBE_TIMEOUT, cost=10,
+                             enabled=lambda: bool(THROUGHPUT_URLS))
+    def check_throughput(self):
+        """
+        Mide la velocidad de descarga desde cada URL de THROUGHPUT_URLS.
+
+        Las descargas se hacen una tras otra, y después de los sondeos de
+        latencia, para que no compitan por el ancho de banda.
+        """
+        return [self.probe_throughput(url) for url in THROUGHPUT_URLS]
+
+    def probe_throughput(self, url):
+        """
+        Descarga una parte acotada de `url` y evalúa la velocidad sostenida y los atascos.
+        """
+        try:
+            stats = measure_throughput(url, proxy=self.proxy_for(urlsplit(url).hostname or ''))
+        except ProbePhaseError as e:
+            return CheckResult('throughput', url, 'fail', f"❌ Prueba de velocidad fallida en {url} ({str(e)})",
+                               [f"Prueba de velocidad fallida en {url}"],
+                               error=f"{e.phase}:{type(e.error).__name__}")
+        except ValueError as e:
+            return CheckResult('throughput', url, 'error',
+                               f"❌ URL no válida para la prueba de velocidad: {str(e)}",
+                               [f"URL no válida para la prueba de velocidad: {url}"], error='ValueError')
+        kbps = stats['throughput'] / 1024
+        timings = {phase: round(value, 4) for phase, value in stats['timings'].items()}
+        timings.update(download=round(stats['seconds'], 4), stalled=round(stats['stalled'], 4),
+                       throughput_kbps=round(kbps, 1))
+        summary = (f"HTTP {stats['status']}, {stats['bytes'] / 1024:.0f} KB en {stats['seconds']:.2f} s, "
+                   f"TTFB {stats['timings'].get('ttfb', 0) * 1000:.0f} ms, "
+                   f"{stats['stalls']} atascos ({stats['stalled']:.1f} s)")
+        if stats['bytes'] < THROUGHPUT_CHUNK:
+            return CheckResult('throughput', url, 'warning',
+                               f"⚠️ La respuesta de {url} es demasiado pequeña para medir la velocidad ({summary})",
+                               timings=timings, error='InsufficientData')
         issues = []
+        if kbps < THROUGHPUT_MIN_KBPS:
+            issues.append(f"Descarga lenta desde {url}: {kbps:.0f} KB/s")
+        if stats['stalls']:
+            issues.append(f"Descarga con atascos desde {url}: {stats['stalls']}")
+        if issues:
+            return CheckResult('throughput', url, 'warning',
+                               f"⚠️ Descarga lenta o con atascos desde {url}: {kbps:.0f} KB/s ({summary})",
+                               issues, timings, 'SlowDownload' if kbps < THROUGHPUT_MIN_KBPS else 'Stalled')
+        return CheckResult('throughput', url, 'ok',
+                           f"✅ Velocidad de descarga desde {url}: {kbps:.0f} KB/s ({summary})", timings=timings)
 
-        # Dominios de CodeGPT
-        codegpt_domains = ['api.codegpt.co', 'storage.codegpt.co', 'api.github.com', 'github.com']
 
-        # Verificar resolución DNS
-        for domain in codegpt_domains:
-            try:
-                socket.gethostbyname(domain)
-                results.append(f"✅ Resolución DNS exitosa para {domain}")
-            except socket.gaierror:
-                msg = f"❌ Resolución DNS fallida para {domain}"
-                results.append(msg)
-                issues.append(f"Problema de DNS con {domain}")
-
-        # Verificar conectividad HTTP
-        for domain in codegpt_domains:
-            try:
-                urllib.request.urlopen(f"https://{domain}", timeout=5)
-                results.append(f"✅ Conexión HTTP exitosa a {domain}")
-            except Exception as e:
-                if "403" not in str(e):  # Ignorar errores 403
-                    msg = f"❌ Conexión HTTP fallida a {domain}: {str(e)}"
-                    results.append(msg)
-                    issues.append(f"Problema de conectividad HTTP con {domain}")
-
-        # Verificar dominios de referencia
-        reference_domains = ['google.com', 'microsoft.com']
-        for domain in reference_domains:
-            try:
-                urllib.request.urlopen(f"https://{domain}", timeout=5)
-                results.append(f"✅ Conexión a {domain} exitosa (prueba de referencia)")
-            except Exception as e:
-                msg = f"❌ Conexión a {domain} fallida: posible problema general de red"
-                results.append(msg)
-                issues.append("Problemas generales de conectividad de red detectados")
+FixStep = namedtuple('FixStep', ['remedy', 'description', 'targets'])
+
+
+class FixPlanner:
+    """
+    Convierte los resultados del diagnóstico en un plan de correcciones.
+
+    Cada remedio aparece una sola vez, en orden de menor a mayor impacto, y
+    los remedios incluidos en otro (el restablecimiento general ya reinicia el
+    adaptador) se descartan, sumando sus objetivos al que los incluye. Las
+    descripciones de cada paso las da `platform` (ver `PlatformCommands`).
+    """
+
+    # Verificación fallida -> remedio
+    REMEDIES = {
+        'dns': 'flush_dns',
+        'http': 'adapter_bounce',
+        'reference': 'network_reset',
+    }
+    ORDER = ('flush_dns', 'network_reset', 'adapter_bounce')
+    SUBSUMES = {'network_reset': ('adapter_bounce',)}
+
+    def __init__(self, platform=None):
+        self.platform = platform or platform_commands()
+
+    def plan(self, results):
+        """
+        Devuelve la lista ordenada de `FixStep` para los resultados fallidos.
+        """
+        targets = {}
+        for result in results:
+            remedy = self.REMEDIES.get(result.check)
+            # Un error del servidor (HTTPxxx) no se corrige tocando la red local
+            if (remedy and result.status in ('fail', 'timeout')
+                    and not (result.error or '').startswith('HTTP')):
+                targets.setdefault(remedy, [])
+                if (result.check, result.target) not in targets[remedy]:
+                    targets[remedy].append((result.check, result.target))
+        for remedy, subsumed in self.SUBSUMES.items():
+            if remedy in targets:
+                for other in subsumed:
+                    targets[remedy].extend(targets.pop(other, []))
+        return [FixStep(remedy, self.platform.descriptions[remedy], targets[remedy])
+                for remedy in self.ORDER if remedy in targets]
 
-        return "\n".join(results) + "\n", issues
 
+# Reintentos de las correcciones: espera base (segundos) que se duplica en cada intento
+FIX_BACKOFF_BASE = 1.0
+FIX_VERIFY_ATTEMPTS = 3
 
-class FixWorker(QThread):
-    progress = pyqtSignal(str)
-    error = pyqtSignal(str)
-    finished = pyqtSignal()
+
+class FixRunner:
+    """
+    Aplica las correcciones para los problemas detectados sin depender de Qt.
+
+    Recibe los `CheckResult` del diagnóstico, los convierte en un plan con
+    `FixPlanner` y, tras cada corrección, vuelve a sondear solo los objetivos
+    afectados. Los comandos salen de `platform` (por defecto, los del sistema
+    actual) y se ejecutan con `commands`, que puede ser un `FakeCommandRunner`.
+
+    Con `dry_run`, los comandos que cambian el sistema se registran en
+    `commands` (por defecto, un `FakeCommandRunner`) sin ejecutarse, las
+    consultas de solo lectura, como la lista de adaptadores, se ejecutan de
+    verdad con `command_runner`, y no se verifica ni se espera nada.
+    """
     MAX_RETRIES = 3
 
-    def __init__(self, issues, parent=None):
-        super().__init__()
-        self.issues = issues
-        self.parent = parent
+    def __init__(self, results, progress=None, error=None, commands=None, platform=None,
+                 sleep=time.sleep, dry_run=False):
+        self.results = results
+        self.progress = progress or (lambda text: None)
+        self.error = error or (lambda text: None)
+        self.dry_run = dry_run
+        if dry_run:
+            self.commands = commands or FakeCommandRunner()
+            self.queries = command_runner
+        else:
+            self.commands = commands or command_runner
+            self.queries = self.commands
+        self.platform = platform or platform_commands()
+        self.sleep = sleep
+        self.remedies = {
+            'flush_dns': self.fix_dns_issues,
+            'adapter_bounce': self.fix_network_issues,
+            'network_reset': self.fix_general_network,
+        }
 
     def run(self):
-      """
-      Ejecuta las soluciones basadas en los problemas detectados.
-      """
-      for issue in self.issues:
-            retry_count = 0
-            while retry_count < self.MAX_RETRIES:
-                try:
-                    if "DNS resolution issue" in issue:
-                       self.fix_dns_issues()
-                    elif "HTTP connectivity issue" in issue:
-                        self.fix_network_issues()
-                    elif "General network connectivity issues" in issue:
-                        self.fix_general_network()
-                    break  # If successful, exit loop
-                except Exception as e:
-                    retry_count += 1
-                    if retry_count < self.MAX_RETRIES:
-                        self.progress.emit(f"Reintentando operación ({retry_count}/{self.MAX_RETRIES})...")
-                    else:
-                        logger.error(f"Error después de {self.MAX_RETRIES} intentos: {str(e)}", exc_info=True)
-                        self.error.emit(f"Error después de {self.MAX_RETRIES} intentos: {str(e)}")
-                        break # Exit loop after max retries
-      self.finished.emit()
+        """
+        Ejecuta las soluciones basadas en los problemas detectados.
+
+        Devuelve la lista de objetivos (verificación, objetivo) que siguen fallando.
+        """
+        plan = FixPlanner(self.platform).plan(self.results)
+        if not plan:
+            self.progress("No hay correcciones automáticas para los problemas detectados.\n")
+            return []
+        remaining = []
+        for step in plan:
+            self.progress(f"🔧 {step.description} ({len(step.targets)} objetivos afectados)")
+            if self.dry_run:
+                self.remedies[step.remedy]()
+                self.progress("[simulación] No se vuelven a sondear los objetivos: no se cambió nada\n")
+                remaining.extend(step.targets)
+            elif self.apply(step):
+                remaining.extend(self.verify(step))
+            else:
+                remaining.extend(step.targets)
+        return remaining
+
+    def apply(self, step):
+        """
+        Aplica un remedio reintentando con espera exponencial si falla.
+        """
+        for attempt in range(self.MAX_RETRIES):
+            try:
+                self.remedies[step.remedy]()
+                return True
+            except Exception as e:
+                if attempt + 1 < self.MAX_RETRIES:
+                    delay = FIX_BACKOFF_BASE * 2 ** attempt
+                    self.progress(f"Reintentando operación ({attempt + 1}/{self.MAX_RETRIES}) en {delay:.0f} s...")
+                    self.sleep(delay)
+                else:
+                    logger.error(f"Error después de {self.MAX_RETRIES} intentos: {str(e)}", exc_info=True)
+                    self.error(f"Error después de {self.MAX_RETRIES} intentos: {str(e)}")
+        return False
+
+    def reprobe(self, check, target):
+        """
+        Repite una única verificación de red y devuelve su `CheckResult`.
+        """
+        runner = DiagnosticRunner()
+        probes = {'dns': runner.probe_dns, 'http': runner.probe_http, 'reference': runner.probe_reference}
+        return probes[check](target)
+
+    def verify(self, step):
+        """
+        Vuelve a sondear los objetivos del remedio, esperando entre intentos a
+        que la red se recupere. Devuelve los que siguen fallando.
+        """
+        # Las respuestas y conexiones anteriores a la corrección ya no sirven
+        probe_pool.close_all()
+        for _, target in step.targets:
+            dns_cache.invalidate(target)
+        pending = list(step.targets)
+        for attempt in range(FIX_VERIFY_ATTEMPTS):
+            if attempt:
+                self.sleep(FIX_BACKOFF_BASE * 2 ** (attempt - 1))
+            probes = [(check, target, lambda c=check, t=target: self.reprobe(c, t))
+                      for check, target in pending]
+            pending = [(result.check, result.target) for result in ProbeEngine().run(probes)
+                       if result.status != 'ok']
+            if not pending:
+                self.progress(f"✅ {step.description}: todos los objetivos responden\n")
+                return []
+        failing = ", ".join(f"{check} {target}" for check, target in pending)
+        self.progress(f"⚠️ {step.description}: siguen fallando {failing}\n")
+        return pending
+
+    def run_commands(self, groups):
+        """
+        Ejecuta los grupos de comandos de un remedio mostrando su salida.
+        """
+        prefix = "[simulación] " if self.dry_run else ""
+        for group in groups:
+            for args in group:
+                self.progress(f"{prefix}$ {' '.join(args)}")
+            self.commands.run_many(group, on_line=lambda line: self.progress(f"   {line}"))
+
+    def done(self, message):
+        """
+        Informa de que un remedio terminó o, en simulación, de que no se ejecutó.
+        """
+        if self.dry_run:
+            self.progress(f"[simulación] {message} (no se ejecutó ningún comando)\n")
+        else:
+            self.progress(f"✅ {message}\n")
 
     def fix_dns_issues(self):
         """
         Intenta resolver problemas de DNS.
         """
-        self.progress.emit("Limpiando caché DNS...")
+        self.progress("Limpiando caché DNS...")
+        groups = self.platform.flush_dns()
+        if not groups:
+            self.progress(f"⚠️ No hay un comando para limpiar la caché DNS en {self.platform.name}.\n")
+            return
         try:
-            subprocess.run(['ipconfig', '/flushdns'], check=True, shell=True)
-            self.progress.emit("✅ Caché DNS limpiada exitosamente\n")
-        except subprocess.CalledProcessError as e:
+            self.run_commands(groups)
+            self.done("Caché DNS limpiada")
+        except CommandError as e:
             raise Exception(f"Error al limpiar la caché DNS: {str(e)}")
 
     def fix_network_issues(self):
-      """
-      Intenta resolver problemas de red.
-      """
-      self.progress.emit("Reconfigurando adaptador de red...\n")
-      try:
-           # Try disabling and then enabling network adapter
-          adapter_name = self.get_first_network_adapter_name()
-          if adapter_name:
-             self.progress.emit(f"Deshabilitando adaptador de red '{adapter_name}'...\n")
-             subprocess.run(['netsh', 'interface', 'set', 'interface', f'name="{adapter_name}"', 'admin=disabled'],
-                             check=True, shell=True)
-             self.progress.emit(f"Habilitando adaptador de red '{adapter_name}'...\n")
-             subprocess.run(['netsh', 'interface', 'set', 'interface', f'name="{adapter_name}"', 'admin=enabled'],
-                              check=True, shell=True)
-             self.progress.emit("✅ Adaptador de red reconfigurado.\n")
-          else:
-              self.progress.emit("⚠️ No se detectó un adaptador de red activo para reconfigurar.\n")
-      except subprocess.CalledProcessError as e:
-             raise Exception(f"Error al reconfigurar el adaptador de red: {str(e)}")
+        """
+        Intenta resolver problemas de red.
+        """
+        self.progress("Reconfigurando adaptador de red...\n")
+        adapter_name = self.get_first_network_adapter_name()
+        if not adapter_name:
+            self.progress("⚠️ No se detectó un adaptador de red activo para reconfigurar.\n")
+            return
+        try:
+            self.progress(f"{self.platform.descriptions['adapter_bounce']} ('{adapter_name}')...\n")
+            self.run_commands(self.platform.adapter_bounce(adapter_name))
+            self.done("Adaptador de red reconfigurado")
+        except CommandError as e:
+            raise Exception(f"Error al reconfigurar el adaptador de red: {str(e)}")
 
     def fix_general_network(self):
-       """
-       Intenta resolver problemas generales de red.
-       """
-       self.progress.emit("Restableciendo la configuración de red...\n")
-       try:
-           subprocess.run(['netsh', 'int', 'ip', 'reset'], check=True, shell=True)
-           subprocess.run(['netsh', 'winsock', 'reset'], check=True, shell=True)
-           self.progress.emit("✅ Configuración de red restablecida.\n")
-           self.fix_network_issues()  # Reconfigurar el adaptador de red
-       except Exception as e:
+        """
+        Intenta resolver problemas generales de red.
+        """
+        self.progress("Restableciendo la configuración de red...\n")
+        try:
+            groups = self.platform.network_reset()
+            if groups:
+                self.run_commands(groups)
+                self.done("Configuración de red restablecida")
+            self.fix_network_issues()  # Reconfigurar el adaptador de red
+        except Exception as e:
             raise Exception(f"Error al restablecer la configuración de red: {str(e)}")
 
-
     def get_first_network_adapter_name(self):
-      """
-      Obtiene el nombre del primer adaptador de red habilitado que no sea virtual.
-      """
-      try:
-          result = subprocess.run(['netsh', 'interface', 'show', 'interface'],
-                                  capture_output=True, text=True, shell=True)
-          lines = result.stdout.splitlines()
-          for line in lines:
-              match = re.search(r'([^ ]+)(?=\s+Enabled)', line)
-              if match:
-                  adapter_name = match.group(1).strip()
-                  if 'Virtual' not in adapter_name:
-                      return adapter_name
-          return None
-      except Exception as e:
-          logger.error(f"Error al obtener el nombre del adaptador: {str(e)}", exc_info=True)
-          return None
-
-class CodeGPTTroubleshooter(QMainWindow):
-    def __init__(self):
-        super().__init__()
-        self.setWindowTitle("Diagnóstico de la Extensión CodeGPT")
-        self.setGeometry(100, 100, 800, 600)
-        self.setup_ui()
-        self.setup_styles()
-        self.setup_tooltips()
-
-    def setup_ui(self):
-        """
-        Configura la interfaz de usuario.
-        """
-        self.central_widget = QWidget()
-        self.setCentralWidget(self.central_widget)
-        main_layout = QVBoxLayout()
-
-        # Enlace "REPORT A BUG"
-        self.bug_report_label = QLabel('<a href="https://github.com/JudiniLabs/code-gpt-docs/issues">REPORT A BUG</a>', self)
-        self.bug_report_label.setAlignment(Qt.AlignRight | Qt.AlignTop)
-        self.bug_report_label.setOpenExternalLinks(True)
-        self.bug_report_label.setStyleSheet("color: red; font-weight: bold;")
-        main_layout.addWidget(self.bug_report_label)
-
-        # Mensaje de reinicio
-        self.restart_message = QLabel("¿HAS PROBADO CON REINICIAR TU PC? 😉", self)
-        self.restart_message.setFont(QFont("Arial", 16, QFont.Bold))
-        self.restart_message.setStyleSheet("color: black; font-style: italic;")
-        self.restart_message.setAlignment(Qt.AlignCenter)
-        main_layout.addWidget(self.restart_message)
-
-        # Barra de menú
-        self.menu_bar = QMenuBar()
-        self.file_menu = self.menu_bar.addMenu("Archivo")
-        self.save_action = QAction("Guardar Informe", self)
-        self.save_action.triggered.connect(self.save_report)
-        self.file_menu.addAction(self.save_action)
-        self.exit_action = QAction("Salir", self)
-        self.exit_action.triggered.connect(self.close)
-        self.file_menu.addAction(self.exit_action)
-        self.setMenuBar(self.menu_bar)
-
-        # Etiqueta de título
-        self.title_label = QLabel("Diagnóstico de Extensión CodeGPT", self)
-        self.title_label.setFont(QFont("Arial", 18, QFont.Bold))
-        self.title_label.setStyleSheet("color: #00AA00; text-align: center;")
-        main_layout.addWidget(self.title_label, alignment=Qt.AlignCenter)
-
-        # Checkbox de modo detallado
-        self.verbose_checkbox = QCheckBox("Modo Detallado", self)
-        self.verbose_checkbox.setChecked(True)
-        main_layout.addWidget(self.verbose_checkbox, alignment=Qt.AlignCenter)
-
-        # Área de texto para resultados
-        self.result_text = QPlainTextEdit(self)
-        font = QFont("Courier", 12)
-        self.result_text.setFont(font)
-        self.result_text.setReadOnly(True)
-        main_layout.addWidget(self.result_text)
-
-        # Barra de progreso
-        self.progress_bar = QProgressBar(self)
-        self.progress_bar.setRange(0, 0)
-        self.progress_bar.setVisible(False)
-        main_layout.addWidget(self.progress_bar)
-
-        # Layout de botones
-        button_layout = QHBoxLayout()
-
-        # Botón de ejecutar diagnósticos
-        self.run_button = QPushButton("Ejecutar Diagnósticos", self)
-        self.run_button.clicked.connect(self.run_diagnostics_threaded)
-        button_layout.addWidget(self.run_button)
-
-        # Botón de solucionar problemas
-        self.fix_button = QPushButton("Intentar Solucionar Problemas", self)
-        self.fix_button.clicked.connect(self.fix_issues)
-        button_layout.addWidget(self.fix_button)
-
-        # Botón de reiniciar extensión
-        self.restart_extension_button = QPushButton("Reiniciar Extensión", self)
-        self.restart_extension_button.clicked.connect(self.restart_extension)
-        button_layout.addWidget(self.restart_extension_button)
-
-        # Botón de reiniciar PC (color rojo, a la derecha)
-        self.restart_pc_button = QPushButton("Reiniciar PC", self)
-        self.restart_pc_button.clicked.connect(self.restart_pc)
-        self.restart_pc_button.setStyleSheet("background-color: red; color: white;")
-        button_layout.addWidget(self.restart_pc_button)
-
-        # Aplicar fuente a los botones
-        font = QFont()
-        font.setPointSize(12)
-        self.run_button.setFont(font)
-        self.fix_button.setFont(font)
-        self.restart_extension_button.setFont(font)
-        self.restart_pc_button.setFont(font)
-
-        main_layout.addLayout(button_layout)
-
-        # Etiqueta de estado
-        self.status_label = QLabel(self)
-        self.status_label.setStyleSheet("color: #00AA00;")
-        main_layout.addWidget(self.status_label, alignment=Qt.AlignCenter)
-
-        # Establecer el layout principal
-        self.central_widget.setLayout(main_layout)
-
-        # Inicializar workers
-        self.worker = None
-        self.fix_worker = None
-
-    def setup_styles(self):
-        """
-        Configura los estilos de la interfaz.
-        """
-        button_style = """
-        QPushButton {
-            background-color: #4CAF50;
-            border: none;
-            color: white;
-            padding: 8px 16px;
-            border-radius: 4px;
-            font-weight: bold;
-        }
-        QPushButton:hover {
-            background-color: #45a049;
-        }
-        QPushButton:pressed {
-            background-color: #357a38;
-        }
         """
-        self.run_button.setStyleSheet(button_style)
-        self.fix_button.setStyleSheet(button_style)
-        self.restart_extension_button.setStyleSheet(button_style)
-        self.restart_pc_button.setStyleSheet(button_style + "background-color: red;")
+        Obtiene el nombre del primer adaptador de red conectado que no sea virtual.
+        """
+        command = self.platform.list_adapters()
+        if not command:
+            return None
+        try:
+            return self.platform.parse_adapter(self.queries.run(command).output)
+        except CommandError as e:
+            logger.error(f"Error al obtener el nombre del adaptador: {str(e)}")
+            return None
+
+
+# Monitoreo continuo: intervalo entre pasadas, variación aleatoria y tamaño del historial
+MONITOR_INTERVAL = 60
+MONITOR_JITTER = 0.1
+MONITOR_HISTORY = 1440
+
+MonitorSample = namedtuple('MonitorSample', ['timestamp', 'elapsed', 'issues'])
+
+
+class DiagnosticMonitor:
+    """
+    Repite el diagnóstico a intervalos regulares y detecta cambios de estado.
+
+    Conserva solo las últimas `history_size` pasadas en un buffer circular, de
+    modo que el uso de memoria no crece en monitoreos de varios días. Cada
+    pasada repite todas las verificaciones sin `CheckCache`: un resultado
+    reutilizado ocultaría justo los fallos intermitentes que se buscan.
+    """
+
+    def __init__(self, interval=MONITOR_INTERVAL, jitter=MONITOR_JITTER, history_size=MONITOR_HISTORY,
+                 progress=None, error=None, on_transition=None, on_sample=None, on_result=None):
+        self.interval = interval
+        self.jitter = jitter
+        self.history = deque(maxlen=history_size)
+        self.progress = progress
+        self.error = error or (lambda text: None)
+        self.on_transition = on_transition or (lambda text: None)
+        self.on_sample = on_sample or (lambda sample: None)
+        self.on_result = on_result
+        self.last_results = []
+        self._stop = threading.Event()
+
+    def next_delay(self):
+        """
+        Calcula la espera hasta la próxima pasada aplicando la variación aleatoria.
+        """
+        spread = self.interval * self.jitter
+        return max(0.0, self.interval + random.uniform(-spread, spread))
 
-    def setup_tooltips(self):
+    def run_once(self):
         """
-        Configura los tooltips para los elementos de la interfaz.
+        Ejecuta una pasada, la guarda en el historial y notifica las transiciones.
         """
-        self.run_button.setToolTip("Ejecuta un diagnóstico completo del sistema")
-        self.fix_button.setToolTip("Intenta resolver automáticamente los problemas detectados")
-        self.restart_pc_button.setToolTip("Reinicia la PC para aplicar todos los cambios")
-        self.restart_extension_button.setToolTip("Reinicia la extensión CodeGPT")
-        self.verbose_checkbox.setToolTip("Muestra información detallada del diagnóstico")
+        start = time.monotonic()
+        runner = DiagnosticRunner(progress=self.progress, error=self.error,
+                                  on_result=self.on_result, use_cache=False)
+        issues = runner.run()
+        self.last_results = runner.results
+        sample = MonitorSample(time.time(), time.monotonic() - start, tuple(dict.fromkeys(issues)))
+        previous = self.history[-1] if self.history else None
+        self.history.append(sample)
+        self.on_sample(sample)
+        if previous is not None:
+            for transition in self.transitions(previous, sample):
+                self.on_transition(transition)
+        return sample
 
-    def show_error(self, message):
+    @staticmethod
+    def transitions(previous, current):
         """
-        Muestra un diálogo de error.
+        Describe los problemas que aparecieron o se resolvieron entre dos pasadas.
         """
-        QMessageBox.critical(self, "Error", message)
-        logger.error(message)
+        stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(current.timestamp))
+        before = set(previous.issues)
+        after = set(current.issues)
+        changes = [f"[{stamp}] 🔴 OK → fallando: {issue}" for issue in current.issues if issue not in before]
+        changes += [f"[{stamp}] 🟢 fallando → OK: {issue}" for issue in previous.issues if issue not in after]
+        return changes
 
-    def check_vscode_extensions(self, ext_id):
+    def run(self, passes=None):
         """
-        Verifica si la extensión CodeGPT está instalada.
+        Ejecuta pasadas hasta que se llame a `stop` o se completen `passes`.
         """
-        result = subprocess.run(['code', '--list-extensions', '--show-versions'],
-                                capture_output=True, text=True, shell=True)
-        extensions = result.stdout.splitlines()
-        codegpt_extensions = [ext for ext in extensions if ext_id in ext]
-        if codegpt_extensions:
-            res = "✅ Extensiones de CodeGPT Instaladas:\n"
-            for ext in codegpt_extensions:
-                res += f"   - {ext}\n"
-            return res, []
-        else:
-            res = "❌ No se encontraron extensiones de CodeGPT\n"
-            return res, ["Extensión de CodeGPT no instalada"]
+        self._stop.clear()
+        count = 0
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Error en la pasada de monitoreo: {str(e)}", exc_info=True)
+                self.error(f"Error en la pasada de monitoreo: {str(e)}")
+            count += 1
+            if passes is not None and count >= passes:
+                break
+            self._stop.wait(self.next_delay())
 
-    def run_diagnostics_threaded(self):
+    def stop(self):
         """
-        Inicia el diagnóstico en un hilo separado.
+        Detiene el monitoreo al terminar la pasada en curso.
         """
-        self.progress_bar.setVisible(True)
-        self.status_label.setText("Ejecutando diagnósticos...")
-        self.worker = WorkerThread(parent=self)
-        self.worker.progress.connect(self.append_result)
-        self.worker.finished.connect(self.on_diagnostics_finished)
-        self.worker.error.connect(self.show_error)
-        self.worker.start()
+        self._stop.set()
+
+
+# Agregación de resultados de la flota: percentiles publicados, clases de
+# error mostradas por verificación y fracción de máquinas con fallos a partir
+# de la cual se sospecha una caída general
+FLEET_QUANTILES = (50, 95, 99)
+FLEET_TOP_ERRORS = 5
+FLEET_SYSTEMIC_SHARE = 0.5
+FLEET_FAILED = ('fail', 'error', 'timeout')
+# Dirección del endpoint de métricas del monitoreo (solo local)
+METRICS_HOST = '127.0.0.1'
+
+
+class FleetAggregator:
+    """
+    Agrega resultados NDJSON de muchas máquinas por verificación y objetivo.
 
-    def append_result(self, text):
+    Por cada par (verificación, objetivo) cuenta estados, clases de error y
+    máquinas afectadas, y guarda cada métrica de `timings` en una columna de
+    floats (array('d')); los percentiles se calculan al pedir el resumen,
+    ordenando cada columna una sola vez. Con `window`, cada columna conserva
+    solo los últimos `window` valores, para que el monitoreo no crezca sin
+    límite.
+    """
+
+    def __init__(self, window=None):
+        self.window = window
+        self.series = {}
+        self.machines = set()
+        self.records = 0
+        self.invalid = 0
+        self._lock = threading.Lock()
+
+    def add(self, record, machine=None):
         """
-        Añade texto al área de resultados.
+        Añade un resultado serializado con `CheckResult.to_dict`.
+
+        `machine` se usa si el registro no indica de qué máquina procede.
         """
-        self.result_text.appendPlainText(text)
-        if self.verbose_checkbox.isChecked():
-            logger.debug(text)
+        machine = record.get('machine') or machine or socket.gethostname()
+        key = (str(record['check']), str(record['target']))
+        status = record['status']
+        failed = status in FLEET_FAILED
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {'statuses': Counter(), 'errors': Counter(), 'machines': set(),
+                                             'failed_machines': set(), 'metrics': {}}
+            self.records += 1
+            self.machines.add(machine)
+            series['statuses'][status] += 1
+            series['machines'].add(machine)
+            if failed:
+                series['failed_machines'].add(machine)
+            if status != 'ok' and record.get('error'):
+                series['errors'][record['error']] += 1
+            for name, value in (record.get('timings') or {}).items():
+                if isinstance(value, list):
+                    # Sondeos con varias muestras: [p50, p95, máx]
+                    value = value[0] if value else None
+                if not isinstance(value, (int, float)) or isinstance(value, bool):
+                    continue
+                column = series['metrics'].get(name)
+                if column is None:
+                    column = series['metrics'][name] = deque(maxlen=self.window) if self.window else array('d')
+                column.append(float(value))
 
-    def on_diagnostics_finished(self, issues):
+    def add_result(self, result):
         """
-        Maneja la finalización del diagnóstico.
+        Añade un `CheckResult` de esta máquina.
         """
-        self.progress_bar.setVisible(False)
-        self.status_label.setText("Diagnóstico completado")
-        self.issues = issues
-        self.generate_report()
+        self.add(result.to_dict())
 
-    def generate_report(self):
+    def ingest(self, lines, machine=None):
         """
-        Genera el informe de diagnóstico.
+        Añade cada línea NDJSON de `lines`; las líneas no válidas se cuentan y se ignoran.
         """
-        self.result_text.appendPlainText("\n🔍 Informe de Diagnóstico de CodeGPT:\n")
-        if not self.issues:
-            self.result_text.appendPlainText("✨ ¡No se detectaron problemas!\n")
-        else:
-            self.result_text.appendPlainText("⚠️ Problemas Detectados:\n")
-            for issue in self.issues:
-                self.result_text.appendPlainText(f"- {issue}\n")
-            self.result_text.appendPlainText("\n💡 Acciones Recomendadas:\n")
-            self.result_text.appendPlainText("1. Reiniciar VSCode\n")
-            self.result_text.appendPlainText("2. Verificar configuración de red\n")
-            self.result_text.appendPlainText("3. Limpiar caché DNS\n")
-            self.result_text.appendPlainText("4. Reinstalar la extensión\n")
-            self.result_text.appendPlainText("5. Reiniciar la extensión CodeGPT\n")
-
-    def fix_issues(self):
-        """
-        Inicia el proceso de corrección de problemas.
-        """
-        if not hasattr(self, 'issues') or not self.issues:
-            QMessageBox.information(self, "Información", "No hay problemas para solucionar.")
-            return
-        reply = QMessageBox.question(self, "Confirmar",
-                                     "¿Desea intentar solucionar los problemas detectados?",
-                                     QMessageBox.Yes | QMessageBox.No)
-        if reply == QMessageBox.Yes:
-            self.progress_bar.setVisible(True)
-            self.status_label.setText("Solucionando problemas...")
-            self.fix_worker = FixWorker(self.issues, parent=self)
-            self.fix_worker.progress.connect(self.append_result)
-            self.fix_worker.finished.connect(self.on_fix_finished)
-            self.fix_worker.error.connect(self.show_error)
-            self.fix_worker.start()
-
-    def on_fix_finished(self):
-        """
-        Maneja la finalización del proceso de corrección.
-        """
-        self.progress_bar.setVisible(False)
-        self.status_label.setText("Correcciones completadas")
-        QMessageBox.information(self, "Información",
-                                "Se han aplicado todas las correcciones posibles.\n"
-                                "Se recomienda reiniciar el sistema.")
-
-    def restart_pc(self):
-        """
-        Maneja el reinicio del sistema.
-        """
-        reply = QMessageBox.question(self, "Confirmar",
-                                     "¿Está seguro de que desea reiniciar el sistema?",
-                                     QMessageBox.Yes | QMessageBox.No)
-        if reply == QMessageBox.Yes:
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
             try:
-                subprocess.run(['shutdown', '/r', '/t', '60', '/c',
-                                "El sistema se reiniciará en 60 segundos para aplicar los cambios."],
-                               check=True, shell=True)
-                QMessageBox.information(self, "Reinicio Programado",
-                                        "El sistema se reiniciará en 60 segundos.\n"
-                                        "Guarde su trabajo y cierre todos los programas.")
-            except Exception as e:
-                self.show_error(f"Error al reiniciar el sistema: {str(e)}")
+                record = json.loads(line)
+                self.add(record, machine)
+            except (ValueError, KeyError, TypeError, AttributeError):
+                self.invalid += 1
 
-    def restart_extension(self):
+    def ingest_path(self, path):
         """
-        Reinicia la extensión CodeGPT.
+        Añade un archivo NDJSON (también comprimido con gzip), todos los
+        .ndjson de un directorio, o la entrada estándar si `path` es '-'.
+
+        Si un registro no indica su máquina, se toma la ruta del archivo.
         """
-        try:
-            # Ejecuta el comando para reiniciar el host de extensiones en VSCode
-            subprocess.run(['code', '--command', 'workbench.action.restartExtensionHost'], check=True, shell=True)
-            self.append_result("✅ Extensión CodeGPT reiniciada exitosamente.\n")
-        except Exception as e:
-            self.show_error(f"Error al reiniciar la extensión: {str(e)}")
+        if path == '-':
+            self.ingest(sys.stdin, 'stdin')
+            return
+        if os.path.isdir(path):
+            with os.scandir(path) as entries:
+                names = sorted(entry.path for entry in entries
+                               if entry.is_file() and entry.name.endswith(('.ndjson', '.ndjson.gz')))
+            for name in names:
+                self.ingest_path(name)
+            return
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8', errors='replace') as f:
+            self.ingest(f, path)
 
-    def save_report(self):
+    @staticmethod
+    def quantiles(column):
         """
-        Guarda el informe en un archivo.
+        Devuelve count, sum y los percentiles de FLEET_QUANTILES de una columna.
         """
-        file_path, _ = QFileDialog.getSaveFileName(
-            self, "Guardar Informe", "", "Archivos de texto (*.txt)")
-        if file_path:
-            try:
-                with open(file_path, 'w', encoding='utf-8') as file:
-                    file.write(self.result_text.toPlainText())
-                self.status_label.setText(f"Informe guardado en {file_path}")
-            except Exception as e:
-                self.show_error(f"Error al guardar el informe: {str(e)}")
+        ordered = sorted(column)
+        count = len(ordered)
+        stats = {'count': count, 'sum': sum(ordered)}
+        for pct in FLEET_QUANTILES:
+            stats[f"p{pct}"] = ordered[int(max(1, -(-count * pct // 100))) - 1]
+        return stats
+
+    def summary(self):
+        """
+        Resume la flota; las series van de mayor a menor tasa de fallos.
+
+        La tasa de fallos excluye las verificaciones omitidas. Una serie es
+        'systemic' si falla en al menos FLEET_SYSTEMIC_SHARE de las máquinas
+        que la ejecutaron, y hay más de una.
+        """
+        rows = []
+        with self._lock:
+            for (check, target), series in self.series.items():
+                statuses = series['statuses']
+                total = sum(statuses.values())
+                counted = total - statuses['skipped']
+                failed = sum(statuses[status] for status in FLEET_FAILED)
+                machines = len(series['machines'])
+                failed_machines = len(series['failed_machines'])
+                rows.append({
+                    'check': check,
+                    'target': target,
+                    'results': total,
+                    'failed': failed,
+                    'failure_rate': failed / counted if counted else 0.0,
+                    'statuses': dict(statuses),
+                    'machines': machines,
+                    'failed_machines': failed_machines,
+                    'systemic': machines > 1 and failed_machines / machines >= FLEET_SYSTEMIC_SHARE,
+                    'errors': series['errors'].most_common(FLEET_TOP_ERRORS),
+                    'metrics': {name: self.quantiles(column) for name, column in series['metrics'].items()
+                                if column},
+                })
+            totals = {'machines': len(self.machines), 'records': self.records, 'invalid': self.invalid}
+        rows.sort(key=lambda row: (-row['failure_rate'], row['check'], row['target']))
+        totals['series'] = rows
+        return totals
+
+    @staticmethod
+    def format_summary(summary):
+        """
+        Formatea el resumen de la flota para la consola.
+        """
+        invalid = f", {summary['invalid']} líneas no válidas" if summary['invalid'] else ""
+        lines = [f"📊 Resumen de la flota: {summary['machines']} máquinas, "
+                 f"{summary['records']} resultados{invalid}"]
+        for row in summary['series']:
+            lines.append(f"\n{row['check']} {row['target']}: {row['results']} resultados en "
+                         f"{row['machines']} máquinas")
+            marker = " ⚠️ posible caída general" if row['systemic'] else ""
+            lines.append(f"   Fallos: {row['failure_rate'] * 100:.1f}% ({row['failed']} resultados, "
+                         f"{row['failed_machines']} máquinas){marker}")
+            for name, stats in row['metrics'].items():
+                if name.endswith('_kbps'):
+                    values = " · ".join(f"p{pct} {stats[f'p{pct}']:.0f} KB/s" for pct in FLEET_QUANTILES)
+                else:
+                    values = " · ".join(f"p{pct} {stats[f'p{pct}'] * 1000:.1f} ms" for pct in FLEET_QUANTILES)
+                lines.append(f"   {PHASE_LABELS.get(name, name)}: {values}")
+            if row['errors']:
+                errors = ", ".join(f"{error} ×{count}" for error, count in row['errors'])
+                lines.append(f"   Errores: {errors}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def openmetrics(summary, extra=()):
+        """
+        Exporta el resumen en el formato de texto de Prometheus, que también
+        aceptan los clientes de OpenMetrics.
+
+        `extra` es una lista de (nombre, tipo, ayuda, valor) con métricas
+        adicionales sin etiquetas.
+        """
+        families = {}
+
+        def sample(name, kind, help_text, labels, value, family=None):
+            family = family or name
+            entry = families.setdefault(family, (kind, help_text, []))
+            text = ",".join(f'{key}="{_metric_label(label)}"' for key, label in labels.items())
+            entry[2].append(f"{name}{{{text}}} {value:g}" if text else f"{name} {value:g}")
+
+        sample('codegpt_fleet_machines', 'gauge', "Máquinas con resultados", {}, summary['machines'])
+        sample('codegpt_fleet_records_total', 'counter', "Resultados agregados", {}, summary['records'])
+        sample('codegpt_fleet_invalid_records_total', 'counter', "Líneas NDJSON no válidas", {},
+               summary['invalid'])
+        for name, kind, help_text, value in extra:
+            sample(name, kind, help_text, {}, value)
+        for row in summary['series']:
+            labels = {'check': row['check'], 'target': row['target']}
+            for status, count in sorted(row['statuses'].items()):
+                sample('codegpt_check_results_total', 'counter', "Resultados por verificación y estado",
+                       dict(labels, status=status), count)
+            sample('codegpt_check_failure_ratio', 'gauge', "Fracción de resultados fallidos", labels,
+                   row['failure_rate'])
+            sample('codegpt_check_failed_machines', 'gauge', "Máquinas con algún fallo", labels,
+                   row['failed_machines'])
+            for error, count in row['errors']:
+                sample('codegpt_check_errors_total', 'counter', "Resultados no correctos por clase de error",
+                       dict(labels, error=error), count)
+            for metric, stats in row['metrics'].items():
+                if metric.endswith('_kbps'):
+                    family, help_text = 'codegpt_check_throughput_kbps', "Velocidad de descarga (KB/s)"
+                else:
+                    family, help_text = 'codegpt_check_timing_seconds', "Tiempos de cada fase (segundos)"
+                metric_labels = dict(labels, metric=metric)
+                for pct in FLEET_QUANTILES:
+                    sample(family, 'summary', help_text, dict(metric_labels, quantile=f"{pct / 100:g}"),
+                           stats[f"p{pct}"])
+                sample(f"{family}_sum", 'summary', help_text, metric_labels, stats['sum'], family)
+                sample(f"{family}_count", 'summary', help_text, metric_labels, stats['count'], family)
+        lines = []
+        for family, (kind, help_text, samples) in families.items():
+            lines.append(f"# HELP {family} {help_text}")
+            lines.append(f"# TYPE {family} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+def _metric_label(value):
+    """
+    Escapa el valor de una etiqueta del formato de texto de Prometheus.
+    """
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsServer:
+    """
+    Servidor HTTP local que publica /metrics en el formato de texto de
+    Prometheus; `render()` se llama en cada petición.
+    """
+
+    def __init__(self, render, port, host=METRICS_HOST):
+        # http.server solo se importa si se piden métricas
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                if handler.path.split('?', 1)[0] != '/metrics':
+                    handler.send_error(404)
+                    return
+                try:
+                    body = render().encode('utf-8')
+                except Exception as e:
+                    logger.error(f"Error al generar las métricas: {str(e)}", exc_info=True)
+                    handler.send_error(500)
+                    return
+                handler.send_response(200)
+                handler.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                handler.send_header('Content-Length', str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, format, *args):
+                logger.debug(f"Métricas: {format % args}")
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}/metrics"
+        threading.Thread(target=self.server.serve_forever, name="metricas", daemon=True).start()
+
+    def close(self):
+        """
+        Detiene el servidor y libera el puerto.
+        """
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# Presupuesto de arranque del modo headless (milisegundos)
+STARTUP_BUDGET_MS = 500
+
+
+def run_headless(as_json=False, fix=False, ndjson_path=None, use_cache=True, dry_run=False):
+    """
+    Ejecuta el diagnóstico (y opcionalmente las correcciones) sin interfaz.
+
+    Si se indica `ndjson_path`, cada resultado se escribe en ese archivo en
+    cuanto se produce. Con `dry_run`, las correcciones solo muestran los
+    comandos que ejecutarían. Devuelve el código de salida: 0 si no se detectaron
+    problemas, 1 si los hay.
+    """
+    messages = []
+    errors = []
+    results = []
+    if as_json:
+        progress = messages.append
+    else:
+        def progress(text):
+            messages.append(text)
+            print(text.rstrip('\n'), flush=True)
+
+    writer = NdjsonReportWriter(ndjson_path) if ndjson_path else None
+
+    def on_result(result):
+        if as_json:
+            results.append(result.to_dict())
+        if writer:
+            writer.write(result)
+
+    start = time.monotonic()
+    try:
+        runner = DiagnosticRunner(progress=progress, error=errors.append, on_result=on_result,
+                                  use_cache=use_cache)
+        issues = runner.run()
+        if fix and issues:
+            FixRunner(runner.results, progress=progress, error=errors.append, dry_run=dry_run).run()
+    finally:
+        if writer:
+            writer.close()
+    elapsed = time.monotonic() - start
+
+    if as_json:
+        json.dump({'issues': issues, 'results': results, 'messages': messages, 'errors': errors,
+                   'elapsed': round(elapsed, 3)}, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        for error in errors:
+            print(f"Error: {error}", file=sys.stderr)
+        print("\n🔍 Informe de Diagnóstico de CodeGPT:")
+        if not issues:
+            print("✨ ¡No se detectaron problemas!")
+        else:
+            print("⚠️ Problemas Detectados:")
+            for issue in issues:
+                print(f"- {issue}")
+    return 1 if issues else 0
+
+
+def run_monitor(interval=MONITOR_INTERVAL, history_size=MONITOR_HISTORY, passes=None, verbose=False,
+                ndjson_path=None, metrics_port=None):
+    """
+    Ejecuta el monitoreo continuo sin interfaz hasta Ctrl+C.
+
+    Si se indica `ndjson_path`, los resultados de todas las pasadas se añaden
+    a ese archivo a medida que se producen. Con `metrics_port`, los resultados
+    se agregan (ver `FleetAggregator`, con las últimas `history_size` muestras
+    de cada tiempo) y se publican en http://127.0.0.1:PUERTO/metrics.
+    """
+    writer = NdjsonReportWriter(ndjson_path, append=True) if ndjson_path else None
+    aggregator = FleetAggregator(window=history_size) if metrics_port is not None else None
+    state = {'passes': 0, 'elapsed': 0.0, 'issues': 0}
+    metrics = None
+
+    def on_result(result):
+        if writer:
+            writer.write(result)
+        if aggregator:
+            aggregator.add_result(result)
+
+    def render_metrics():
+        return FleetAggregator.openmetrics(aggregator.summary(), extra=[
+            ('codegpt_monitor_passes_total', 'counter', "Pasadas de monitoreo completadas", state['passes']),
+            ('codegpt_monitor_last_pass_seconds', 'gauge', "Duración de la última pasada", state['elapsed']),
+            ('codegpt_monitor_issues', 'gauge', "Problemas detectados en la última pasada", state['issues']),
+        ])
+
+    def print_line(text):
+        print(text.rstrip('\n'), flush=True)
+
+    def on_error(text):
+        print(f"Error: {text}", file=sys.stderr, flush=True)
+
+    def on_sample(sample):
+        stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(sample.timestamp))
+        summary = f"{len(sample.issues)} problemas" if sample.issues else "sin problemas"
+        state.update(passes=state['passes'] + 1, elapsed=sample.elapsed, issues=len(sample.issues))
+        print_line(f"[{stamp}] Pasada completada en {sample.elapsed:.2f} s: {summary}")
+
+    monitor = DiagnosticMonitor(interval=interval, history_size=history_size,
+                                progress=print_line if verbose else None, error=on_error,
+                                on_transition=print_line, on_sample=on_sample,
+                                on_result=on_result if writer or aggregator else None)
+    try:
+        if aggregator:
+            metrics = MetricsServer(render_metrics, metrics_port)
+            print_line(f"📈 Métricas disponibles en {metrics.url}")
+        monitor.run(passes=passes)
+    except KeyboardInterrupt:
+        monitor.stop()
+    finally:
+        probe_pool.close_all()
+        if metrics:
+            metrics.close()
+        if writer:
+            writer.close()
+    return 1 if monitor.history and monitor.history[-1].issues else 0
+
+
+def run_aggregate(paths, as_json=False, openmetrics=False):
+    """
+    Agrega informes NDJSON de varias máquinas e imprime el resumen.
+
+    `paths` admite archivos (también .gz), directorios y '-' para la entrada
+    estándar. Devuelve 1 si alguna verificación parece una caída general,
+    0 en otro caso.
+    """
+    aggregator = FleetAggregator()
+    for path in paths:
+        try:
+            aggregator.ingest_path(path)
+        except OSError as e:
+            print(f"Error: no se pudo leer {path}: {str(e)}", file=sys.stderr)
+    summary = aggregator.summary()
+    if openmetrics:
+        sys.stdout.write(FleetAggregator.openmetrics(summary))
+    elif as_json:
+        json.dump(summary, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        print(FleetAggregator.format_summary(summary))
+    return 1 if any(row['systemic'] for row in summary['series']) else 0
+
+
+def check_startup_budget(budget_ms=STARTUP_BUDGET_MS):
+    """
+    Mide el tiempo de importación del módulo en un intérprete limpio.
+
+    Devuelve 0 si se cumple el presupuesto y Qt no se importó, 1 en otro caso.
+    """
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    code = ("import sys, time; t = time.perf_counter(); import DiagnosticosCodegpt; "
+            "print((time.perf_counter() - t) * 1000, 'PyQt5' in sys.modules)")
+    result = subprocess.run([sys.executable, '-c', code], cwd=module_dir,
+                            capture_output=True, text=True, timeout=30)
+    if result.returncode != 0:
+        print(result.stderr, file=sys.stderr)
+        return 1
+    elapsed_ms, qt_loaded = result.stdout.split()
+    elapsed_ms = float(elapsed_ms)
+    print(f"Importación en {elapsed_ms:.1f} ms (presupuesto {budget_ms} ms), Qt cargado: {qt_loaded}")
+    return 0 if elapsed_ms <= budget_ms and qt_loaded == 'False' else 1
+
+
+def parse_args(argv=None):
+    """
+    Analiza los argumentos de línea de comandos.
+    """
+    parser = argparse.ArgumentParser(description="Diagnóstico de la Extensión CodeGPT")
+    parser.add_argument('--headless', action='store_true',
+                        help="ejecuta el diagnóstico sin interfaz gráfica")
+    parser.add_argument('--json', action='store_true',
+                        help="en modo headless, imprime el resultado como JSON")
+    parser.add_argument('--fix', action='store_true',
+                        help="en modo headless, intenta solucionar los problemas detectados")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="con --fix, muestra los comandos de corrección sin ejecutarlos")
+    parser.add_argument('--monitor', action='store_true',
+                        help="repite el diagnóstico sin interfaz hasta Ctrl+C")
+    parser.add_argument('--interval', type=float, default=MONITOR_INTERVAL, metavar='SEGUNDOS',
+                        help="intervalo entre pasadas de monitoreo")
+    parser.add_argument('--history', type=int, default=MONITOR_HISTORY, metavar='N',
+                        help="pasadas de monitoreo conservadas en memoria")
+    parser.add_argument('--passes', type=int, metavar='N',
+                        help="detiene el monitoreo tras N pasadas")
+    parser.add_argument('--verbose', action='store_true',
+                        help="en monitoreo, muestra todos los resultados de cada pasada")
+    parser.add_argument('--ndjson', metavar='ARCHIVO',
+                        help="escribe cada resultado como NDJSON en ARCHIVO a medida que se produce")
+    parser.add_argument('--aggregate', nargs='+', metavar='ARCHIVO',
+                        help="agrega informes NDJSON de varias máquinas (archivos, .gz, directorios o -)")
+    parser.add_argument('--openmetrics', action='store_true',
+                        help="con --aggregate, imprime el resumen en formato Prometheus/OpenMetrics")
+    parser.add_argument('--metrics-port', type=int, metavar='PUERTO',
+                        help="en monitoreo, publica las métricas en http://127.0.0.1:PUERTO/metrics")
+    parser.add_argument('--fresh', action='store_true',
+                        help="repite todas las verificaciones sin reutilizar resultados en caché")
+    parser.add_argument('--dns-resolver', action='append', type=resolver_argument, metavar='IP[:PUERTO]',
+                        help="resolvedor DNS directo a comparar con el del sistema (repetible)")
+    parser.add_argument('--port', action='append', type=int, metavar='PUERTO',
+                        help="puerto adicional a verificar por conflictos (repetible)")
+    parser.add_argument('--throughput', action='append', nargs='?', const=THROUGHPUT_DEFAULT_URL,
+                        metavar='URL',
+                        help=f"mide la velocidad de descarga (por defecto desde {THROUGHPUT_DEFAULT_URL}; repetible)")
+    parser.add_argument('--log-file', default=LOG_FILE, metavar='ARCHIVO',
+                        help="archivo de log (se rota por tamaño)")
+    parser.add_argument('--log-json', action='store_true',
+                        help="escribe el log en formato JSON lines")
+    parser.add_argument('--check-startup', nargs='?', type=float, const=STARTUP_BUDGET_MS,
+                        metavar='MS', help="verifica el presupuesto de tiempo de arranque")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.check_startup is not None:
+        return check_startup_budget(args.check_startup)
+    setup_logging(args.log_file, json_lines=args.log_json)
+    if args.aggregate:
+        return run_aggregate(args.aggregate, as_json=args.json, openmetrics=args.openmetrics)
+    if args.dns_resolver:
+        DNS_RESOLVERS[:] = args.dns_resolver
+    for port in args.port or []:
+        CODEGPT_PORTS.setdefault(port, ())
+    if args.throughput:
+        THROUGHPUT_URLS[:] = args.throughput
+    if args.monitor:
+        return run_monitor(interval=args.interval, history_size=args.history,
+                           passes=args.passes, verbose=args.verbose, ndjson_path=args.ndjson,
+                           metrics_port=args.metrics_port)
+    if args.headless or args.json or args.ndjson:
+        return run_headless(as_json=args.json, fix=args.fix, ndjson_path=args.ndjson,
+                            use_cache=not args.fresh, dry_run=args.dry_run)
+
+    # La interfaz gráfica solo se importa cuando se abre la ventana
+    # Reutilizar este módulo al importarlo desde la interfaz en lugar de cargarlo dos veces
+    sys.modules.setdefault('DiagnosticosCodegpt', sys.modules[__name__])
+    from DiagnosticosCodegptGUI import run_gui
+    return run_gui()
 
 
 if __name__ == "__main__":
     try:
-        app = QApplication(sys.argv)
-        window = CodeGPTTroubleshooter()
-        window.show()
-        sys.exit(app.exec_())
+        sys.exit(main())
     except Exception as e:
         logger.critical(f"La aplicación falló: {str(e)}", exc_info=True)
         raise
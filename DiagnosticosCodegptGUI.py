@@ -0,0 +1,518 @@
+import sys
+import time
+from collections import deque
+import shutil
+from PyQt5.QtWidgets import (
+    QApplication, QMainWindow, QPlainTextEdit, QPushButton, QVBoxLayout, QHBoxLayout,
+    QWidget, QProgressBar, QMenuBar, QAction, QMessageBox, QFileDialog, QLabel,
+    QCheckBox
+)
+from PyQt5.QtGui import QFont
+from PyQt5.QtCore import Qt, pyqtSignal, QThread, QTimer
+
+from DiagnosticosCodegpt import (
+    CODE_CLI_TIMEOUT, DiagnosticMonitor, DiagnosticRunner, FixRunner, NdjsonReportWriter,
+    MONITOR_NDJSON, REPORT_NDJSON, THROUGHPUT_DEFAULT_URL, THROUGHPUT_URLS, command_runner, logger,
+    platform_commands, setup_logging
+)
+
+# Los mensajes de los workers se agrupan y se añaden al área de resultados una
+# vez por intervalo; el área conserva como máximo MAX_RESULT_BLOCKS bloques.
+RESULT_FLUSH_MS = 50
+MAX_RESULT_BLOCKS = 5000
+
+
+def open_report_writer(path, append=False):
+    """
+    Abre el informe NDJSON; si no se puede escribir, el diagnóstico sigue sin él.
+    """
+    try:
+        return NdjsonReportWriter(path, append=append)
+    except OSError as e:
+        logger.warning(f"No se pudo abrir el informe NDJSON {path}: {str(e)}")
+        return None
+
+
+class WorkerThread(QThread):
+    progress = pyqtSignal(str)
+    step = pyqtSignal(int, int)
+    finished = pyqtSignal(list)
+    error = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__()
+        self.parent = parent
+        self.results = []
+
+    def run(self):
+        writer = open_report_writer(REPORT_NDJSON)
+        try:
+            runner = DiagnosticRunner(progress=self.progress.emit, error=self.error.emit,
+                                      on_result=writer.write if writer else None,
+                                      on_progress=self.step.emit)
+            issues = runner.run()
+            self.results = runner.results
+        finally:
+            if writer:
+                writer.close()
+        self.finished.emit(issues)
+
+
+class FixWorker(QThread):
+    progress = pyqtSignal(str)
+    error = pyqtSignal(str)
+    finished = pyqtSignal()
+
+    def __init__(self, results, parent=None):
+        super().__init__()
+        self.results = results
+        self.parent = parent
+
+    def run(self):
+        """
+        Ejecuta las soluciones basadas en los problemas detectados.
+        """
+        FixRunner(self.results, progress=self.progress.emit, error=self.error.emit).run()
+        self.finished.emit()
+
+
+class MonitorWorker(QThread):
+    progress = pyqtSignal(str)
+    transition = pyqtSignal(str)
+    sample = pyqtSignal(object)
+    error = pyqtSignal(str)
+
+    def __init__(self, verbose=False, parent=None):
+        super().__init__()
+        self.parent = parent
+        self.monitor = DiagnosticMonitor(progress=self.progress.emit if verbose else None,
+                                         error=self.error.emit,
+                                         on_transition=self.transition.emit,
+                                         on_sample=self.sample.emit)
+
+    def run(self):
+        """
+        Repite el diagnóstico hasta que se detenga el monitoreo.
+        """
+        writer = open_report_writer(MONITOR_NDJSON, append=True)
+        self.monitor.on_result = writer.write if writer else None
+        try:
+            self.monitor.run()
+        finally:
+            if writer:
+                writer.close()
+
+    def stop(self):
+        """
+        Solicita la detención del monitoreo al terminar la pasada en curso.
+        """
+        self.monitor.stop()
+
+
+class CodeGPTTroubleshooter(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Diagnóstico de la Extensión CodeGPT")
+        self.setGeometry(100, 100, 800, 600)
+        self.setup_ui()
+        self.setup_styles()
+        self.setup_tooltips()
+
+    def setup_ui(self):
+        """
+        Configura la interfaz de usuario.
+        """
+        self.central_widget = QWidget()
+        self.setCentralWidget(self.central_widget)
+        main_layout = QVBoxLayout()
+
+        # Enlace "REPORT A BUG"
+        self.bug_report_label = QLabel('<a href="https://github.com/JudiniLabs/code-gpt-docs/issues">REPORT A BUG</a>', self)
+        self.bug_report_label.setAlignment(Qt.AlignRight | Qt.AlignTop)
+        self.bug_report_label.setOpenExternalLinks(True)
+        self.bug_report_label.setStyleSheet("color: red; font-weight: bold;")
+        main_layout.addWidget(self.bug_report_label)
+
+        # Mensaje de reinicio
+        self.restart_message = QLabel("¿HAS PROBADO CON REINICIAR TU PC? 😉", self)
+        self.restart_message.setFont(QFont("Arial", 16, QFont.Bold))
+        self.restart_message.setStyleSheet("color: black; font-style: italic;")
+        self.restart_message.setAlignment(Qt.AlignCenter)
+        main_layout.addWidget(self.restart_message)
+
+        # Barra de menú
+        self.menu_bar = QMenuBar()
+        self.file_menu = self.menu_bar.addMenu("Archivo")
+        self.save_action = QAction("Guardar Informe", self)
+        self.save_action.triggered.connect(self.save_report)
+        self.file_menu.addAction(self.save_action)
+        self.exit_action = QAction("Salir", self)
+        self.exit_action.triggered.connect(self.close)
+        self.file_menu.addAction(self.exit_action)
+        self.setMenuBar(self.menu_bar)
+
+        # Etiqueta de título
+        self.title_label = QLabel("Diagnóstico de Extensión CodeGPT", self)
+        self.title_label.setFont(QFont("Arial", 18, QFont.Bold))
+        self.title_label.setStyleSheet("color: #00AA00; text-align: center;")
+        main_layout.addWidget(self.title_label, alignment=Qt.AlignCenter)
+
+        # Checkbox de modo detallado
+        self.verbose_checkbox = QCheckBox("Modo Detallado", self)
+        self.verbose_checkbox.setChecked(True)
+        main_layout.addWidget(self.verbose_checkbox, alignment=Qt.AlignCenter)
+
+        # Checkbox de la prueba de velocidad (opcional, descarga datos)
+        self.throughput_checkbox = QCheckBox("Medir Velocidad de Descarga", self)
+        self.throughput_checkbox.setChecked(bool(THROUGHPUT_URLS))
+        main_layout.addWidget(self.throughput_checkbox, alignment=Qt.AlignCenter)
+
+        # Área de texto para resultados
+        self.result_text = QPlainTextEdit(self)
+        font = QFont("Courier", 12)
+        self.result_text.setFont(font)
+        self.result_text.setReadOnly(True)
+        self.result_text.setMaximumBlockCount(MAX_RESULT_BLOCKS)
+        main_layout.addWidget(self.result_text)
+
+        # Canal de salida agrupada hacia el área de resultados
+        self.pending_results = deque(maxlen=MAX_RESULT_BLOCKS)
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(RESULT_FLUSH_MS)
+        self.flush_timer.timeout.connect(self.flush_results)
+
+        # Barra de progreso
+        self.progress_bar = QProgressBar(self)
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setVisible(False)
+        main_layout.addWidget(self.progress_bar)
+
+        # Layout de botones
+        button_layout = QHBoxLayout()
+
+        # Botón de ejecutar diagnósticos
+        self.run_button = QPushButton("Ejecutar Diagnósticos", self)
+        self.run_button.clicked.connect(self.run_diagnostics_threaded)
+        button_layout.addWidget(self.run_button)
+
+        # Botón de monitoreo continuo
+        self.monitor_button = QPushButton("Iniciar Monitoreo", self)
+        self.monitor_button.clicked.connect(self.toggle_monitoring)
+        button_layout.addWidget(self.monitor_button)
+
+        # Botón de solucionar problemas
+        self.fix_button = QPushButton("Intentar Solucionar Problemas", self)
+        self.fix_button.clicked.connect(self.fix_issues)
+        button_layout.addWidget(self.fix_button)
+
+        # Botón de reiniciar extensión
+        self.restart_extension_button = QPushButton("Reiniciar Extensión", self)
+        self.restart_extension_button.clicked.connect(self.restart_extension)
+        button_layout.addWidget(self.restart_extension_button)
+
+        # Botón de reiniciar PC (color rojo, a la derecha)
+        self.restart_pc_button = QPushButton("Reiniciar PC", self)
+        self.restart_pc_button.clicked.connect(self.restart_pc)
+        self.restart_pc_button.setStyleSheet("background-color: red; color: white;")
+        button_layout.addWidget(self.restart_pc_button)
+
+        # Aplicar fuente a los botones
+        font = QFont()
+        font.setPointSize(12)
+        self.run_button.setFont(font)
+        self.monitor_button.setFont(font)
+        self.fix_button.setFont(font)
+        self.restart_extension_button.setFont(font)
+        self.restart_pc_button.setFont(font)
+
+        main_layout.addLayout(button_layout)
+
+        # Etiqueta de estado
+        self.status_label = QLabel(self)
+        self.status_label.setStyleSheet("color: #00AA00;")
+        main_layout.addWidget(self.status_label, alignment=Qt.AlignCenter)
+
+        # Establecer el layout principal
+        self.central_widget.setLayout(main_layout)
+
+        # Inicializar workers
+        self.worker = None
+        self.fix_worker = None
+        self.monitor_worker = None
+        self.ndjson_path = REPORT_NDJSON
+
+    def setup_styles(self):
+        """
+        Configura los estilos de la interfaz.
+        """
+        button_style = """
+        QPushButton {
+            background-color: #4CAF50;
+            border: none;
+            color: white;
+            padding: 8px 16px;
+            border-radius: 4px;
+            font-weight: bold;
+        }
+        QPushButton:hover {
+            background-color: #45a049;
+        }
+        QPushButton:pressed {
+            background-color: #357a38;
+        }
+        """
+        self.run_button.setStyleSheet(button_style)
+        self.monitor_button.setStyleSheet(button_style)
+        self.fix_button.setStyleSheet(button_style)
+        self.restart_extension_button.setStyleSheet(button_style)
+        self.restart_pc_button.setStyleSheet(button_style + "background-color: red;")
+
+    def setup_tooltips(self):
+        """
+        Configura los tooltips para los elementos de la interfaz.
+        """
+        self.run_button.setToolTip("Ejecuta un diagnóstico completo del sistema")
+        self.monitor_button.setToolTip("Repite el diagnóstico periódicamente y avisa cuando cambia el estado")
+        self.fix_button.setToolTip("Intenta resolver automáticamente los problemas detectados")
+        self.restart_pc_button.setToolTip("Reinicia la PC para aplicar todos los cambios")
+        self.restart_extension_button.setToolTip("Reinicia la extensión CodeGPT")
+        self.verbose_checkbox.setToolTip("Muestra información detallada del diagnóstico")
+        self.throughput_checkbox.setToolTip(f"Descarga hasta unos megabytes de {THROUGHPUT_DEFAULT_URL} "
+                                            "para medir la velocidad sostenida y los atascos")
+
+    def show_error(self, message):
+        """
+        Muestra un diálogo de error.
+        """
+        QMessageBox.critical(self, "Error", message)
+        logger.error(message)
+
+    def run_diagnostics_threaded(self):
+        """
+        Inicia el diagnóstico en un hilo separado.
+        """
+        self.progress_bar.setVisible(True)
+        self.status_label.setText("Ejecutando diagnósticos...")
+        self.ndjson_path = REPORT_NDJSON
+        self.apply_throughput_option()
+        self.worker = WorkerThread(parent=self)
+        self.worker.progress.connect(self.append_result)
+        self.worker.step.connect(self.on_diagnostics_step)
+        self.worker.finished.connect(self.on_diagnostics_finished)
+        self.worker.error.connect(self.show_error)
+        self.worker.start()
+
+    def apply_throughput_option(self):
+        """
+        Activa o desactiva la prueba de velocidad según el checkbox.
+        """
+        if not self.throughput_checkbox.isChecked():
+            THROUGHPUT_URLS[:] = []
+        elif not THROUGHPUT_URLS:
+            THROUGHPUT_URLS.append(THROUGHPUT_DEFAULT_URL)
+
+    def toggle_monitoring(self):
+        """
+        Inicia o detiene el monitoreo continuo.
+        """
+        if self.monitor_worker is not None and self.monitor_worker.isRunning():
+            self.monitor_worker.stop()
+            self.monitor_button.setEnabled(False)
+            self.status_label.setText("Deteniendo monitoreo...")
+            return
+        self.ndjson_path = MONITOR_NDJSON
+        self.apply_throughput_option()
+        self.monitor_worker = MonitorWorker(verbose=self.verbose_checkbox.isChecked(), parent=self)
+        self.monitor_worker.progress.connect(self.append_result)
+        self.monitor_worker.transition.connect(self.append_result)
+        self.monitor_worker.error.connect(self.append_result)
+        self.monitor_worker.sample.connect(self.on_monitor_sample)
+        self.monitor_worker.finished.connect(self.on_monitoring_stopped)
+        self.monitor_button.setText("Detener Monitoreo")
+        self.run_button.setEnabled(False)
+        self.status_label.setText("Monitoreo en curso...")
+        self.monitor_worker.start()
+
+    def on_monitor_sample(self, sample):
+        """
+        Actualiza el estado con el resultado de la última pasada de monitoreo.
+        """
+        self.issues = list(sample.issues)
+        self.results = self.monitor_worker.monitor.last_results
+        stamp = time.strftime('%H:%M:%S', time.localtime(sample.timestamp))
+        state = f"{len(sample.issues)} problemas" if sample.issues else "sin problemas"
+        self.status_label.setText(f"Monitoreo: última pasada {stamp}, {state}")
+
+    def on_monitoring_stopped(self):
+        """
+        Restablece los botones al detenerse el monitoreo.
+        """
+        self.monitor_button.setText("Iniciar Monitoreo")
+        self.monitor_button.setEnabled(True)
+        self.run_button.setEnabled(True)
+        self.status_label.setText("Monitoreo detenido")
+
+    def closeEvent(self, event):
+        """
+        Detiene el monitoreo antes de cerrar la ventana.
+        """
+        if self.monitor_worker is not None and self.monitor_worker.isRunning():
+            self.monitor_worker.stop()
+            self.monitor_worker.wait()
+        super().closeEvent(event)
+
+    def append_result(self, text):
+        """
+        Encola texto para el área de resultados.
+
+        El texto se añade en el próximo `flush_results`, junto con el resto de
+        mensajes recibidos en el mismo intervalo.
+        """
+        self.pending_results.append(text)
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def flush_results(self):
+        """
+        Añade al área de resultados todos los mensajes pendientes de una vez.
+        """
+        if not self.pending_results:
+            return
+        text = "\n".join(self.pending_results)
+        self.pending_results.clear()
+        self.result_text.appendPlainText(text)
+        if self.verbose_checkbox.isChecked():
+            logger.debug(text)
+
+    def on_diagnostics_step(self, done, total):
+        """
+        Actualiza la barra de progreso con el avance del planificador.
+        """
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+
+    def on_diagnostics_finished(self, issues):
+        """
+        Maneja la finalización del diagnóstico.
+        """
+        self.progress_bar.setVisible(False)
+        self.progress_bar.setRange(0, 0)
+        self.status_label.setText("Diagnóstico completado")
+        self.issues = issues
+        self.results = self.worker.results
+        self.generate_report()
+
+    def generate_report(self):
+        """
+        Genera el informe de diagnóstico.
+        """
+        report = ["\n🔍 Informe de Diagnóstico de CodeGPT:\n"]
+        if not self.issues:
+            report.append("✨ ¡No se detectaron problemas!\n")
+        else:
+            report.append("⚠️ Problemas Detectados:\n")
+            for issue in self.issues:
+                report.append(f"- {issue}\n")
+            report.append("\n💡 Acciones Recomendadas:\n")
+            report.append("1. Reiniciar VSCode\n")
+            report.append("2. Verificar configuración de red\n")
+            report.append("3. Limpiar caché DNS\n")
+            report.append("4. Reinstalar la extensión\n")
+            report.append("5. Reiniciar la extensión CodeGPT\n")
+        self.append_result("\n".join(report))
+
+    def fix_issues(self):
+        """
+        Inicia el proceso de corrección de problemas.
+        """
+        if not hasattr(self, 'issues') or not self.issues:
+            QMessageBox.information(self, "Información", "No hay problemas para solucionar.")
+            return
+        reply = QMessageBox.question(self, "Confirmar",
+                                     "¿Desea intentar solucionar los problemas detectados?",
+                                     QMessageBox.Yes | QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.progress_bar.setVisible(True)
+            self.status_label.setText("Solucionando problemas...")
+            self.fix_worker = FixWorker(self.results, parent=self)
+            self.fix_worker.progress.connect(self.append_result)
+            self.fix_worker.finished.connect(self.on_fix_finished)
+            self.fix_worker.error.connect(self.show_error)
+            self.fix_worker.start()
+
+    def on_fix_finished(self):
+        """
+        Maneja la finalización del proceso de corrección.
+        """
+        self.progress_bar.setVisible(False)
+        self.status_label.setText("Correcciones completadas")
+        QMessageBox.information(self, "Información",
+                                "Se han aplicado todas las correcciones posibles.\n"
+                                "Se recomienda reiniciar el sistema.")
+
+    def restart_pc(self):
+        """
+        Maneja el reinicio del sistema.
+        """
+        reply = QMessageBox.question(self, "Confirmar",
+                                     "¿Está seguro de que desea reiniciar el sistema?",
+                                     QMessageBox.Yes | QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            try:
+                command_runner.run(platform_commands().restart(
+                    60, "El sistema se reiniciará en 60 segundos para aplicar los cambios."))
+                QMessageBox.information(self, "Reinicio Programado",
+                                        "El sistema se reiniciará en 60 segundos.\n"
+                                        "Guarde su trabajo y cierre todos los programas.")
+            except Exception as e:
+                self.show_error(f"Error al reiniciar el sistema: {str(e)}")
+
+    def restart_extension(self):
+        """
+        Reinicia la extensión CodeGPT.
+        """
+        try:
+            # Ejecuta el comando para reiniciar el host de extensiones en VSCode
+            command_runner.run(platform_commands().restart_extension_host(), timeout=CODE_CLI_TIMEOUT)
+            self.append_result("✅ Extensión CodeGPT reiniciada exitosamente.\n")
+        except Exception as e:
+            self.show_error(f"Error al reiniciar la extensión: {str(e)}")
+
+    def save_report(self):
+        """
+        Guarda el informe en un archivo.
+        """
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Guardar Informe", "", "Archivos de texto (*.txt);;Informe NDJSON (*.ndjson)")
+        if file_path:
+            try:
+                if file_path.endswith('.ndjson') or 'ndjson' in selected_filter:
+                    # El informe NDJSON ya está en disco: copiarlo por bloques
+                    shutil.copyfile(self.ndjson_path, file_path)
+                else:
+                    self.flush_results()
+                    with open(file_path, 'w', encoding='utf-8') as file:
+                        file.write(self.result_text.toPlainText())
+                self.status_label.setText(f"Informe guardado en {file_path}")
+            except Exception as e:
+                self.show_error(f"Error al guardar el informe: {str(e)}")
+
+
+def run_gui():
+    """
+    Abre la ventana principal y ejecuta el bucle de eventos de Qt.
+    """
+    app = QApplication(sys.argv)
+    window = CodeGPTTroubleshooter()
+    window.show()
+    return app.exec_()
+
+
+if __name__ == "__main__":
+    setup_logging()
+    try:
+        sys.exit(run_gui())
+    except Exception as e:
+        logger.critical(f"La aplicación falló: {str(e)}", exc_info=True)
+        raise
@@ -0,0 +1,662 @@
+import os
+import sys
+import argparse
+import json
+import platform
+import shutil
+import socket
+import ssl
+import statistics
+import struct
+import tempfile
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Salida por defecto y umbral (%) a partir del cual --compare considera una regresión
+BENCH_OUTPUT = 'benchmark_results.json'
+REGRESSION_THRESHOLD = 20.0
+BENCH_EXTENSIONS = ['codegpt.codegpt@3.4.0', 'ms-python.python@2024.2.0']
+
+# Cada escenario ajusta los servidores locales:
+#   http_latency / dns_latency: segundos de espera antes de responder
+#   dns_mode: 'ok', 'drop' (sin respuesta) o 'servfail'
+#   system_dns: 'ok' o 'fail' (el resolvedor del sistema no resuelve)
+#   direct: 'blackhole' hace que las conexiones directas (sin proxy) nunca respondan
+#   hosts: {dominio: 'blackhole' | 'error' | 'reset'}
+#   code_delay: segundos que tarda el CLI `code` falso
+#   download: {'bytes', 'rate' (bytes/s), 'stall' (pausa a mitad, s), 'drop' (cortar la conexión al
+#             recibir la petición)} activa la prueba de velocidad
+#   proxy: {'source': 'env' | 'settings', 'latency' (s por CONNECT), 'strict_ssl'} pasa por el proxy local
+#   expect: {"verificación objetivo": estado o (estado, prefijo de la clase de error)}; cualquier otro
+#           resultado debe ser 'ok', y una verificación esperada que no se ejecute también es un error
+SCENARIOS = {
+    'all_healthy': {
+        'description': "Todos los servicios responden al instante",
+    },
+    'slow_network': {
+        'description': "Latencia de 150 ms en HTTP y 50 ms en DNS",
+        'http_latency': 0.15, 'dns_latency': 0.05,
+    },
+    'dns_dead': {
+        'description': "Ni el resolvedor del sistema ni los directos responden",
+        'dns_mode': 'drop', 'system_dns': 'fail',
+        'expect': {
+            'dns api.codegpt.co': ('fail', 'ResolutionFailure'),
+            'dns storage.codegpt.co': ('fail', 'ResolutionFailure'),
+            'dns api.github.com': ('fail', 'ResolutionFailure'),
+            'dns github.com': ('fail', 'ResolutionFailure'),
+            'http api.codegpt.co': 'skipped',
+            'http storage.codegpt.co': 'skipped',
+            'http api.github.com': 'skipped',
+            'http github.com': 'skipped',
+            'reference google.com': ('fail', 'dns:'),
+            'reference microsoft.com': ('fail', 'dns:'),
+        },
+    },
+    'dns_servfail': {
+        'description': "Los resolvedores directos devuelven SERVFAIL",
+        'dns_mode': 'servfail',
+        'expect': {'dns api.codegpt.co': 'ok'},
+    },
+    'host_blackholed': {
+        'description': "api.codegpt.co acepta la conexión pero nunca responde",
+        'hosts': {'api.codegpt.co': 'blackhole'},
+        'expect': {'http api.codegpt.co': ('fail', 'tls:')},
+    },
+    'http_errors': {
+        'description': "storage.codegpt.co responde 503 y github.com cierra la conexión",
+        'hosts': {'storage.codegpt.co': 'error', 'github.com': 'reset'},
+        'expect': {'http storage.codegpt.co': ('fail', 'HTTP503'), 'http github.com': ('fail', 'ttfb:')},
+    },
+    'slow_code_cli': {
+        'description': "El CLI `code` tarda 1 s en listar las extensiones",
+        'code_delay': 1.0,
+        'expect': {'extension codegpt.codegpt': 'ok'},
+    },
+    'throttled_download': {
+        'description': "La prueba de velocidad descarga 512 KB limitados a 64 KB/s",
+        'download': {'bytes': 512 * 1024, 'rate': 64 * 1024},
+        'expect': {'throughput https://storage.codegpt.co/download': ('warning', 'SlowDownload')},
+    },
+    'stalled_download': {
+        'description': "La prueba de velocidad descarga 4 MB con una pausa de 1,5 s a mitad",
+        'download': {'bytes': 4 * 1024 * 1024, 'stall': 1.5},
+        'expect': {'throughput https://storage.codegpt.co/download': ('warning', 'Stalled')},
+    },
+    'dropped_download': {
+        'description': "El servidor corta la conexión (RST) en cuanto recibe la petición de descarga",
+        'download': {'bytes': 512 * 1024, 'drop': True},
+        'expect': {'throughput https://storage.codegpt.co/download': ('fail', 'ttfb:')},
+    },
+    'behind_proxy': {
+        'description': "Las conexiones pasan por un proxy CONNECT (HTTPS_PROXY) que tarda 40 ms en abrir cada túnel",
+        'proxy': {'source': 'env', 'latency': 0.04},
+        'expect': {'http api.codegpt.co': 'ok', 'proxy api.codegpt.co': 'ok'},
+    },
+    'proxy_only': {
+        'description': "Solo el proxy de settings.json llega a los servidores; el DNS del sistema no resuelve",
+        'system_dns': 'fail', 'proxy': {'source': 'settings', 'strict_ssl': False},
+        'expect': {
+            'dns api.codegpt.co': ('warning', 'ResolvedByProxy'),
+            'dns storage.codegpt.co': ('warning', 'ResolvedByProxy'),
+            'dns api.github.com': ('warning', 'ResolvedByProxy'),
+            'dns github.com': ('warning', 'ResolvedByProxy'),
+            'http api.codegpt.co': 'ok',
+            'proxy api.codegpt.co': 'ok',
+        },
+    },
+    'slow_proxy': {
+        'description': "Las conexiones directas nunca responden y el proxy tarda 1 s en abrir cada túnel",
+        'direct': 'blackhole', 'proxy': {'source': 'env', 'latency': 1.0},
+        'expect': {'http api.codegpt.co': 'ok', 'proxy api.codegpt.co': 'ok'},
+    },
+}
+BENCH_DOWNLOAD_PATH = '/download'
+
+
+class StandInHttpsServer:
+    """
+    Servidor HTTPS local que sustituye a los dominios reales.
+
+    Responde a cada petición con 200 tras `latency` segundos; `modes` permite
+    que un host responda 503 ('error') o cierre la conexión sin responder
+    ('reset'). Los hosts en 'blackhole' se dirigen a `blackhole_port`, que
+    acepta conexiones TCP pero nunca completa la negociación TLS.
+
+    Un GET a BENCH_DOWNLOAD_PATH devuelve `download['bytes']` bytes limitados
+    a `download['rate']` bytes/s y con una pausa opcional a mitad de la descarga;
+    con `download['drop']` la conexión se corta sin responder.
+    """
+
+    def __init__(self, certfile, keyfile):
+        self.context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.context.load_cert_chain(certfile, keyfile)
+        self.latency = 0.0
+        self.modes = {}
+        self.download = {}
+        self.sock = socket.create_server(('127.0.0.1', 0))
+        self.port = self.sock.getsockname()[1]
+        self.blackhole = socket.create_server(('127.0.0.1', 0), backlog=64)
+        self.blackhole_port = self.blackhole.getsockname()[1]
+        threading.Thread(target=self.serve, name="https-local", daemon=True).start()
+
+    def serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+
+    def handle(self, conn):
+        try:
+            conn.settimeout(10)
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self.context.wrap_socket(conn, server_side=True) as tls:
+                while True:
+                    request = self.read_request(tls)
+                    if request is None:
+                        return
+                    method, path, host = request
+                    mode = self.modes.get(host)
+                    if mode == 'reset':
+                        return
+                    time.sleep(self.latency)
+                    if method == 'GET' and path.startswith(BENCH_DOWNLOAD_PATH):
+                        if self.download.get('drop'):
+                            # SO_LINGER a 0: el cierre envía un RST en lugar de un FIN
+                            tls.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+                            return
+                        self.send_download(tls)
+                        return
+                    status = "503 Service Unavailable" if mode == 'error' else "200 OK"
+                    tls.sendall(f"HTTP/1.1 {status}\r\nContent-Length: 0\r\n"
+                                f"Connection: keep-alive\r\n\r\n".encode('ascii'))
+        except (OSError, ssl.SSLError):
+            pass
+
+    def send_download(self, tls):
+        size = self.download.get('bytes', 0)
+        rate = self.download.get('rate')
+        stall = self.download.get('stall', 0.0)
+        tls.sendall(f"HTTP/1.1 200 OK\r\nContent-Length: {size}\r\n"
+                    f"Content-Type: application/octet-stream\r\nConnection: close\r\n\r\n".encode('ascii'))
+        chunk = bytes(16 * 1024)
+        sent = 0
+        start = time.monotonic()
+        while sent < size:
+            if stall and sent >= size // 2:
+                time.sleep(stall)
+                stall = 0.0
+            count = min(len(chunk), size - sent)
+            tls.sendall(chunk[:count])
+            sent += count
+            if rate:
+                # Esperar hasta el momento en que la velocidad media vuelve al límite
+                time.sleep(max(0.0, start + sent / rate - time.monotonic()))
+
+    @staticmethod
+    def read_request(tls):
+        """
+        Lee la cabecera de una petición; devuelve (método, ruta, host) o None.
+        """
+        data = b''
+        while b'\r\n\r\n' not in data:
+            chunk = tls.recv(4096)
+            if not chunk:
+                return None
+            data += chunk
+        lines = data.split(b'\r\n\r\n', 1)[0].decode('latin-1').split('\r\n')
+        method, path = lines[0].split(' ')[:2]
+        headers = dict(line.split(':', 1) for line in lines[1:] if ':' in line)
+        host = {key.lower(): value.strip() for key, value in headers.items()}.get('host', '')
+        return method, path, host
+
+    def close(self):
+        self.sock.close()
+        self.blackhole.close()
+
+
+class StandInDnsServer:
+    """
+    Resolvedor DNS local por UDP que responde A con 127.0.0.1 y AAAA vacío.
+    """
+
+    def __init__(self):
+        self.latency = 0.0
+        self.mode = 'ok'
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.address = f"127.0.0.1:{self.sock.getsockname()[1]}"
+        threading.Thread(target=self.serve, name="dns-local", daemon=True).start()
+
+    def serve(self):
+        while True:
+            try:
+                query, client = self.sock.recvfrom(512)
+            except OSError:
+                return
+            if self.mode == 'drop':
+                continue
+            response = self.answer(query)
+            # Cada respuesta se retrasa por separado para no serializar las consultas
+            threading.Timer(self.latency, self.send, args=(response, client)).start()
+
+    def send(self, response, client):
+        try:
+            self.sock.sendto(response, client)
+        except OSError:
+            pass
+
+    def answer(self, query):
+        query_id = struct.unpack('!H', query[:2])[0]
+        offset = 12
+        while query[offset]:
+            offset += query[offset] + 1
+        offset += 1
+        qtype = struct.unpack('!H', query[offset:offset + 2])[0]
+        question = query[12:offset + 4]
+        if self.mode == 'servfail':
+            return struct.pack('!HHHHHH', query_id, 0x8182, 1, 0, 0, 0) + question
+        answers = b''
+        if qtype == 1:
+            answers = struct.pack('!HHHIH', 0xC00C, 1, 1, 60, 4) + socket.inet_aton('127.0.0.1')
+        return struct.pack('!HHHHHH', query_id, 0x8180, 1, 1 if answers else 0, 0, 0) + question + answers
+
+    def close(self):
+        self.sock.close()
+
+
+class StandInProxy:
+    """
+    Proxy HTTP local que solo admite CONNECT.
+
+    Cada túnel se dirige al servidor HTTPS local sin pasar por el resolvedor
+    del sistema, como un proxy corporativo con su propio DNS; `latency`
+    retrasa la respuesta al CONNECT.
+    """
+
+    def __init__(self, https):
+        self.https = https
+        self.latency = 0.0
+        self.sock = socket.create_server(('127.0.0.1', 0))
+        self.url = f"http://127.0.0.1:{self.sock.getsockname()[1]}"
+        threading.Thread(target=self.serve, name="proxy-local", daemon=True).start()
+
+    def serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+
+    def handle(self, conn):
+        try:
+            conn.settimeout(10)
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            data = b''
+            while b'\r\n\r\n' not in data:
+                chunk = conn.recv(4096)
+                if not chunk:
+                    conn.close()
+                    return
+                data += chunk
+            method, target = data.split(b'\r\n', 1)[0].decode('latin-1').split(' ')[:2]
+            if method != 'CONNECT':
+                conn.sendall(b"HTTP/1.1 405 Method Not Allowed\r\nContent-Length: 0\r\n\r\n")
+                conn.close()
+                return
+            host = target.rsplit(':', 1)[0]
+            time.sleep(self.latency)
+            port = self.https.blackhole_port if self.https.modes.get(host) == 'blackhole' else self.https.port
+            upstream = socket.create_connection(('127.0.0.1', port), timeout=10)
+            upstream.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn.sendall(b"HTTP/1.1 200 Connection established\r\n\r\n")
+        except OSError:
+            conn.close()
+            return
+        threading.Thread(target=self.pipe, args=(upstream, conn), daemon=True).start()
+        self.pipe(conn, upstream)
+
+    @staticmethod
+    def pipe(source, destination):
+        """
+        Copia datos de `source` a `destination` y cierra ambos extremos al terminar.
+        """
+        try:
+            while True:
+                data = source.recv(65536)
+                if not data:
+                    break
+                destination.sendall(data)
+        except OSError:
+            pass
+        finally:
+            for sock in (source, destination):
+                try:
+                    # shutdown despierta al otro hilo, bloqueado en recv
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                sock.close()
+
+    def close(self):
+        self.sock.close()
+
+
+class StandInResolver:
+    """
+    Sustituye al resolvedor del sistema para los dominios del diagnóstico,
+    dirigiéndolos al servidor HTTPS local como haría una entrada en hosts.
+    """
+
+    def __init__(self, domains, https):
+        self.domains = set(domains)
+        self.https = https
+        self.latency = 0.0
+        self.fail = False
+        self.blackhole = False
+        self._getaddrinfo = socket.getaddrinfo
+
+    def getaddrinfo(self, host, port, *args, **kwargs):
+        if host not in self.domains:
+            return self._getaddrinfo(host, port, *args, **kwargs)
+        time.sleep(self.latency)
+        if self.fail:
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+        if self.blackhole or self.https.modes.get(host) == 'blackhole':
+            port = self.https.blackhole_port
+        else:
+            port = self.https.port
+        return [(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, '', ('127.0.0.1', port))]
+
+    def install(self):
+        socket.getaddrinfo = self.getaddrinfo
+
+    def uninstall(self):
+        socket.getaddrinfo = self._getaddrinfo
+
+
+def write_certificate(core, workdir, domains):
+    """
+    Genera un certificado autofirmado válido para los dominios del diagnóstico.
+    """
+    certfile = os.path.join(workdir, 'cert.pem')
+    keyfile = os.path.join(workdir, 'key.pem')
+    names = ','.join(f"DNS:{domain}" for domain in domains)
+    core.command_runner.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+                             '-keyout', keyfile, '-out', certfile, '-subj', '/CN=diagnosticos-benchmark',
+                             '-addext', f"subjectAltName={names}"])
+    return certfile, keyfile
+
+
+def write_fake_code_cli(workdir):
+    """
+    Crea un CLI `code` falso que lista BENCH_EXTENSIONS tras BENCH_CODE_DELAY segundos.
+    """
+    bindir = os.path.join(workdir, 'bin')
+    os.makedirs(bindir)
+    script = os.path.join(bindir, 'code_cli.py')
+    with open(script, 'w', encoding='utf-8') as file:
+        file.write("import os, time\n"
+                   "time.sleep(float(os.environ.get('BENCH_CODE_DELAY', '0')))\n"
+                   f"print('\\n'.join({BENCH_EXTENSIONS!r}))\n")
+    if sys.platform == 'win32':
+        with open(os.path.join(bindir, 'code.cmd'), 'w', encoding='utf-8') as file:
+            file.write(f'@"{sys.executable}" "{script}" %*\r\n')
+    else:
+        launcher = os.path.join(bindir, 'code')
+        with open(launcher, 'w', encoding='utf-8') as file:
+            file.write(f'#!/bin/sh\nexec "{sys.executable}" "{script}" "$@"\n')
+        os.chmod(launcher, 0o755)
+    return bindir
+
+
+def configure_proxy(core, config, proxy):
+    """
+    Anuncia el proxy local por HTTPS_PROXY o por settings.json, o retira ambos.
+    """
+    os.environ.pop('HTTPS_PROXY', None)
+    settings = core.vscode_settings_path()
+    if os.path.exists(settings):
+        os.remove(settings)
+    proxy.latency = (config or {}).get('latency', 0.0)
+    if not config:
+        return
+    if config['source'] == 'env':
+        os.environ['HTTPS_PROXY'] = proxy.url
+        return
+    os.makedirs(os.path.dirname(settings), exist_ok=True)
+    strict = 'true' if config.get('strict_ssl', True) else 'false'
+    with open(settings, 'w', encoding='utf-8') as file:
+        # Comentarios y coma final, como los deja VS Code
+        file.write(f'{{\n    // Proxy corporativo\n    "http.proxy": "{proxy.url}",\n'
+                   f'    "http.proxyStrictSSL": {strict}, /* certificados */\n}}\n')
+
+
+def apply_scenario(core, scenario, https, resolvers, system, proxy):
+    """
+    Configura los servidores locales y vacía las cachés del diagnóstico.
+    """
+    configure_proxy(core, scenario.get('proxy'), proxy)
+    https.latency = scenario.get('http_latency', 0.0)
+    https.modes = dict(scenario.get('hosts', {}))
+    https.download = dict(scenario.get('download', {}))
+    core.THROUGHPUT_URLS[:] = [f"https://storage.codegpt.co{BENCH_DOWNLOAD_PATH}"] if https.download else []
+    for server in resolvers:
+        server.latency = scenario.get('dns_latency', 0.0)
+        server.mode = scenario.get('dns_mode', 'ok')
+    system.latency = scenario.get('dns_latency', 0.0)
+    system.fail = scenario.get('system_dns') == 'fail'
+    system.blackhole = scenario.get('direct') == 'blackhole'
+    os.environ['BENCH_CODE_DELAY'] = str(scenario.get('code_delay', 0.0))
+
+
+def reset_caches(core, domains):
+    """
+    Vacía las conexiones, las respuestas DNS y el índice de extensiones
+    guardados para que cada repetición mida el diagnóstico completo.
+    """
+    core.probe_pool.close_all()
+    core.extension_inventory.invalidate()
+    for domain in domains:
+        core.dns_cache.invalidate(domain)
+
+
+def check_expectations(scenario, observed):
+    """
+    Compara los estados observados en cada repetición con `scenario['expect']`.
+
+    `observed` es {clave: [(estado, clase_de_error), ...]}. Devuelve la lista
+    de discrepancias en texto.
+    """
+    expected = scenario.get('expect', {})
+    mismatches = [f"{key}: esperado {expectation}, no se ejecutó"
+                  for key, expectation in expected.items() if key not in observed]
+    for key, outcomes in observed.items():
+        status, prefix = expected.get(key, 'ok'), None
+        if isinstance(status, tuple):
+            status, prefix = status
+        for got, error in outcomes:
+            if got != status or (prefix and not (error or '').startswith(prefix)):
+                wanted = f"{status} ({prefix})" if prefix else status
+                mismatches.append(f"{key}: esperado {wanted}, obtenido {got} ({error})")
+                break
+    return mismatches
+
+
+def run_scenario(core, scenario, domains, repeat):
+    """
+    Ejecuta el diagnóstico `repeat` veces y resume tiempos, memoria y las
+    discrepancias con los resultados esperados.
+    """
+    walls = []
+    checks = {}
+    observed = {}
+    issues = []
+    tracemalloc.start()
+    try:
+        for _ in range(repeat):
+            reset_caches(core, domains)
+            start = time.monotonic()
+
+            def on_result(result):
+                key = f"{result.check} {result.target}"
+                entry = checks.setdefault(key,
+                                          {'status': result.status, 'completed_ms': [], 'timings': None})
+                entry['status'] = result.status
+                entry['completed_ms'].append((time.monotonic() - start) * 1000)
+                entry['timings'] = result.timings
+                observed.setdefault(key, []).append((result.status, result.error))
+
+            runner = core.DiagnosticRunner(on_result=on_result, use_cache=False)
+            issues = runner.run()
+            walls.append(time.monotonic() - start)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    for entry in checks.values():
+        entry['completed_ms'] = round(statistics.median(entry['completed_ms']), 1)
+    return {
+        'wall_s': {'median': round(statistics.median(walls), 4), 'min': round(min(walls), 4),
+                   'max': round(max(walls), 4)},
+        'peak_memory_kb': round(peak / 1024, 1),
+        'issues': len(issues),
+        'mismatches': check_expectations(scenario, observed),
+        'checks': checks,
+    }
+
+
+def compare_results(current, previous_path, threshold=REGRESSION_THRESHOLD):
+    """
+    Compara con un resultado anterior y devuelve 1 si algún escenario es más
+    lento que el umbral indicado.
+    """
+    with open(previous_path, encoding='utf-8') as file:
+        previous = json.load(file)
+    regressions = []
+    print(f"\nComparación con {previous_path}:")
+    for name, data in current['scenarios'].items():
+        old = previous.get('scenarios', {}).get(name)
+        if not old:
+            print(f"  {name:<20} (nuevo)")
+            continue
+        before, after = old['wall_s']['median'], data['wall_s']['median']
+        delta = (after - before) / before * 100 if before else 0.0
+        marker = ""
+        if delta > threshold:
+            marker = "  ⚠️ regresión"
+            regressions.append(name)
+        print(f"  {name:<20} {before:8.3f} s → {after:8.3f} s ({delta:+6.1f}%), memoria "
+              f"{old['peak_memory_kb']:.0f} → {data['peak_memory_kb']:.0f} KB{marker}")
+    return 1 if regressions else 0
+
+
+def parse_args(argv=None):
+    """
+    Analiza los argumentos de línea de comandos.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark del diagnóstico de CodeGPT con servidores locales")
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help="escenario a ejecutar (se puede repetir; por defecto, todos)")
+    parser.add_argument('--repeat', type=int, default=3, metavar='N',
+                        help="repeticiones de cada escenario")
+    parser.add_argument('--output', default=BENCH_OUTPUT, metavar='ARCHIVO',
+                        help="archivo JSON donde guardar los resultados")
+    parser.add_argument('--compare', metavar='ARCHIVO',
+                        help="resultado anterior con el que comparar")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD, metavar='PORCENTAJE',
+                        help="aumento del tiempo que se considera regresión")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix='diagnosticos-benchmark-')
+    try:
+        return run_benchmark(args, workdir)
+    finally:
+        # Certificados, claves, estado y logs de la ejecución
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run_benchmark(args, workdir):
+    """
+    Ejecuta los escenarios con el entorno aislado en `workdir` y devuelve el
+    código de salida: 1 si algún resultado no es el esperado o si --compare
+    detecta una regresión.
+    """
+    # El entorno aislado debe existir antes de importar el módulo
+    os.environ['DIAGNOSTICOS_CODEGPT_STATE'] = os.path.join(workdir, 'estado')
+    os.environ['VSCODE_EXTENSIONS'] = os.path.join(workdir, 'sin-extensiones')
+    os.environ['XDG_CONFIG_HOME'] = os.path.join(workdir, 'config')
+    os.environ['APPDATA'] = os.path.join(workdir, 'config')
+    for name in ('HTTP_PROXY', 'HTTPS_PROXY', 'ALL_PROXY', 'NO_PROXY'):
+        os.environ.pop(name, None)
+        os.environ.pop(name.lower(), None)
+    os.environ['PATH'] = write_fake_code_cli(workdir) + os.pathsep + os.environ.get('PATH', '')
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import DiagnosticosCodegpt as core
+    core.setup_logging(os.path.join(workdir, 'benchmark.log'))
+
+    domains = core.CODEGPT_DOMAINS + core.REFERENCE_DOMAINS
+    certfile, keyfile = write_certificate(core, workdir, domains)
+    os.environ['SSL_CERT_FILE'] = certfile
+    https = StandInHttpsServer(certfile, keyfile)
+    resolvers = [StandInDnsServer(), StandInDnsServer()]
+    core.DNS_RESOLVERS[:] = [server.address for server in resolvers]
+    system = StandInResolver(domains, https)
+    system.install()
+    proxy = StandInProxy(https)
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'scenarios': {},
+    }
+    try:
+        for name in args.scenario or list(SCENARIOS):
+            scenario = SCENARIOS[name]
+            apply_scenario(core, scenario, https, resolvers, system, proxy)
+            result = run_scenario(core, scenario, domains, args.repeat)
+            result['description'] = scenario['description']
+            report['scenarios'][name] = result
+            print(f"{name:<20} {result['wall_s']['median']:8.3f} s  "
+                  f"{result['peak_memory_kb']:9.0f} KB  {result['issues']:3d} problemas  "
+                  f"{scenario['description']}")
+            for mismatch in result['mismatches']:
+                print(f"   ❌ {mismatch}")
+    finally:
+        system.uninstall()
+        configure_proxy(core, None, proxy)
+        proxy.close()
+        https.close()
+        for server in resolvers:
+            server.close()
+        core.shutdown_logging()
+    if resource is not None:
+        scale = 1 if sys.platform == 'darwin' else 1024
+        report['max_rss_kb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 1024, 1)
+
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    print(f"\nResultados guardados en {args.output}")
+    status = compare_results(report, args.compare, args.threshold) if args.compare else 0
+    failed = [name for name, result in report['scenarios'].items() if result['mismatches']]
+    if failed:
+        print(f"\n❌ Resultados distintos de los esperados en: {', '.join(failed)}")
+        return 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())